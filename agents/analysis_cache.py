@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+
+class CachedAnalysis(NamedTuple):
+    """Análise armazenada e se ela ainda corresponde aos dados atuais"""
+    analysis: str
+    created_at: float
+    fresh: bool
+
+
+class AnalysisCache:
+    """Cache persistente (SQLite) das análises de mercado geradas pelo modelo"""
+
+    def __init__(self, path: str, ttl: float = 900, max_entries: int = 500, max_stale_age: float = 86400):
+        """
+        Inicializa o cache de análises
+
+        Args:
+            path (str): Caminho do arquivo SQLite
+            ttl (float): Tempo em segundos em que uma análise é considerada atual
+            max_entries (int): Número máximo de análises armazenadas
+            max_stale_age (float): Idade máxima em segundos de uma análise desatualizada
+                que ainda pode ser exibida enquanto outra é gerada
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_stale_age = max_stale_age
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    symbol TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    model_id TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    analysis TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (symbol, timeframe, model_id)
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        """Abre uma conexão por operação (uso seguro entre threads e processos) e confirma a transação"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, symbol: str, timeframe: str, model_id: str, fingerprint: str) -> Optional[CachedAnalysis]:
+        """
+        Busca a última análise de um ativo
+
+        Args:
+            symbol (str): Par de moedas ou ativo B3
+            timeframe (str): Intervalo de tempo
+            model_id (str): Modelo que gerou a análise
+            fingerprint (str): Impressão digital das barras atuais
+
+        Returns:
+            CachedAnalysis: Análise armazenada (fresh=False se os dados mudaram ou o
+                TTL expirou) ou None se não houver análise utilizável
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT fingerprint, analysis, created_at FROM analyses "
+                "WHERE symbol = ? AND timeframe = ? AND model_id = ?",
+                (symbol, timeframe, model_id)
+            ).fetchone()
+            if row is None:
+                return None
+
+            stored_fingerprint, analysis, created_at = row
+            age = now - created_at
+            if age > self.max_stale_age:
+                return None
+
+            conn.execute(
+                "UPDATE analyses SET accessed_at = ? WHERE symbol = ? AND timeframe = ? AND model_id = ?",
+                (now, symbol, timeframe, model_id)
+            )
+
+        fresh = stored_fingerprint == fingerprint and age <= self.ttl
+        return CachedAnalysis(analysis, created_at, fresh)
+
+    def put(self, symbol: str, timeframe: str, model_id: str, fingerprint: str, analysis: str):
+        """Armazena uma análise e descarta as menos acessadas além do limite"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses "
+                "(symbol, timeframe, model_id, fingerprint, analysis, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (symbol, timeframe, model_id, fingerprint, analysis, now, now)
+            )
+            conn.execute("DELETE FROM analyses WHERE created_at < ?", (now - self.max_stale_age,))
+            conn.execute(
+                "DELETE FROM analyses WHERE rowid NOT IN "
+                "(SELECT rowid FROM analyses ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
@@ -1,32 +1,52 @@
-from agno.agent import Agent
-from agno.models.perplexity import Perplexity
-from agno.tools import tool
 import pandas as pd
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 import json
+import os
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 from data.forex_data import ForexDataProvider
+from .analysis_cache import AnalysisCache
+from data.indicators import latest_values
+from .payloads import build_compact_payload, price_decimals
+from .rate_limiter import RateLimiter
 
 class ForexTools:
     """Ferramentas para interação com dados do mercado Forex"""
     
-    def __init__(self):
+    def __init__(self, token_budget: Optional[int] = None):
+        """
+        Inicializa as ferramentas
+        
+        Args:
+            token_budget (int, opcional): Tokens aproximados por resposta de dados OHLC.
+                Se não informado, usa AGENT_TOOL_TOKEN_BUDGET (padrão 1500)
+        """
         self.data_provider = ForexDataProvider()
+        self.token_budget = token_budget or int(os.getenv("AGENT_TOOL_TOKEN_BUDGET", "1500"))
+    
+    def as_agent_tools(self) -> List[Any]:
+        """Retorna as funções expostas ao modelo como ferramentas do agente"""
+        return [self.get_available_pairs, self.get_ohlc_data, self.get_current_price, self.get_technical_indicators]
     
-    @tool
     def get_available_pairs(self) -> List[str]:
         """Retorna a lista de pares de moedas disponíveis"""
         return self.data_provider.get_available_pairs()
     
-    @tool
-    def get_ohlc_data(self, symbol: str, timeframe: str = '1d', days_back: int = 2) -> Dict[str, Any]:
+    def get_ohlc_data(self, symbol: str, timeframe: str = '1d', days_back: int = 2, compact: bool = True) -> Dict[str, Any]:
         """
         Obtém dados OHLC para um par de moedas
         
         Args:
             symbol (str): Par de moedas (ex: 'EURUSD')
-            timeframe (str): Intervalo de tempo ('1h', '4h', '1d')
+            timeframe (str): Intervalo de tempo ('1h', '2h', '4h', '1d', '1wk')
             days_back (int): Número de dias para retornar
+            compact (bool): Se True, retorna resumo, indicadores e a série em formato
+                colunar (t/o/h/l/c), reduzida para caber no orçamento de tokens
             
         Returns:
             Dict: Dados OHLC em formato JSON
@@ -36,6 +56,10 @@ class ForexTools:
         if data.empty:
             return {"error": f"Não foi possível obter dados para {symbol}"}
         
+        if compact:
+            indicators = self.data_provider.get_indicators(symbol, timeframe, days_back, data=data)
+            return build_compact_payload(data, symbol, timeframe, self.token_budget, indicators=indicators)
+        
         # Converte o DataFrame para o formato JSON
         data_json = data.reset_index().to_dict(orient='records')
         
@@ -45,7 +69,6 @@ class ForexTools:
             "data": data_json
         }
     
-    @tool
     def get_current_price(self, symbol: str) -> Dict[str, Any]:
         """
         Obtém o preço atual de um par de moedas
@@ -54,30 +77,83 @@ class ForexTools:
             symbol (str): Par de moedas (ex: 'EURUSD')
             
         Returns:
-            Dict: Preço atual em formato JSON
+            Dict: Preço atual e idade da cotação (segundos) em formato JSON
         """
-        price = self.data_provider.get_current_price(symbol)
+        quote = self.data_provider.get_current_quote(symbol)
         
-        if price is None:
+        if quote is None:
             return {"error": f"Não foi possível obter o preço atual para {symbol}"}
         
+        price, age_seconds = quote
+        return {
+            "symbol": symbol,
+            "price": price,
+            "age_seconds": round(age_seconds, 1)
+        }
+
+    def get_technical_indicators(self, symbol: str, timeframe: str = '1d', days_back: int = 2) -> Dict[str, Any]:
+        """
+        Obtém os valores mais recentes dos indicadores técnicos de um par de moedas
+        
+        Args:
+            symbol (str): Par de moedas (ex: 'EURUSD')
+            timeframe (str): Intervalo de tempo ('1h', '2h', '4h', '1d', '1wk')
+            days_back (int): Número de dias considerados
+            
+        Returns:
+            Dict: SMA, EMA, RSI, ATR, Bandas de Bollinger, MACD e volatilidade (% por barra)
+        """
+        data = self.data_provider.get_ohlc_data(symbol, timeframe, days_back)
+        
+        if data.empty:
+            return {"error": f"Não foi possível obter dados para {symbol}"}
+        
+        indicators = self.data_provider.get_indicators(symbol, timeframe, days_back, data=data)
         return {
             "symbol": symbol,
-            "price": price
+            "timeframe": timeframe,
+            "time": str(data.index[-1]),
+            "close": float(data['close'].iloc[-1]),
+            "indicators": latest_values(indicators, price_decimals(float(data['close'].iloc[-1])))
         }
 
 class ForexAgent:
     """Agente para análise de mercado Forex"""
     
-    def __init__(self, model_id: str = "llama-3.1-sonar-small-128k-online"):
+    # Número de barras fechadas recentes usadas na impressão digital dos dados de uma análise
+    FINGERPRINT_BARS = 50
+    
+    def __init__(self, model_id: str = "llama-3.1-sonar-small-128k-online", analysis_cache: Optional[AnalysisCache] = None):
         """
         Inicializa o agente Forex
         
         Args:
             model_id (str): ID do modelo Perplexity a ser utilizado
+            analysis_cache (AnalysisCache, opcional): Cache das análises geradas. Se não
+                informado, usa o arquivo definido em ANALYSIS_CACHE_PATH (vazio desativa)
         """
+        self.model_id = model_id
         self.tools = ForexTools()
         
+        # Cache persistente das análises, chaveado pelos dados que as originaram
+        if analysis_cache is None:
+            cache_path = os.getenv("ANALYSIS_CACHE_PATH", os.path.join(".cache", "analyses.sqlite3"))
+            if cache_path:
+                analysis_cache = AnalysisCache(cache_path, ttl=float(os.getenv("ANALYSIS_CACHE_TTL", "900")))
+        self.analysis_cache = analysis_cache
+        
+        # Atualizações de análises desatualizadas em segundo plano
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="analysis-refresh")
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        
+        # Limites para chamadas ao provedor do modelo
+        self.max_concurrency = int(os.getenv("ANALYSIS_MAX_CONCURRENCY", "4"))
+        self.rate_limiter = RateLimiter(
+            float(os.getenv("ANALYSIS_RATE_LIMIT", "30")),
+            burst=self.max_concurrency
+        )
+        
         # Instruções para o agente
         self.system_prompt = """
         Você é um agente especializado em análise de mercado Forex.
@@ -88,66 +164,307 @@ class ForexAgent:
         responda às consultas de forma clara e objetiva.
         """
         
-        # Inicializa o agente com o modelo Perplexity e as ferramentas Forex
-        self.agent = Agent(
-            model=Perplexity(id=model_id),
-            tools=[self.tools],
+        # O agente (agno + cliente do modelo) só é criado na primeira análise
+        self._agent = None
+        self._agent_lock = threading.Lock()
+        
+        # Tempo gasto na criação dos componentes carregados sob demanda
+        self.init_timings = {}
+    
+    @property
+    def agent(self):
+        """Agente agno com o modelo Perplexity, criado no primeiro uso"""
+        if self._agent is None:
+            with self._agent_lock:
+                if self._agent is None:
+                    self._agent = self._build_agent()
+        return self._agent
+    
+    def _build_agent(self):
+        """Importa o agno e cria o agente com o modelo Perplexity e as ferramentas Forex"""
+        started = time.perf_counter()
+        from agno.agent import Agent
+        from agno.models.perplexity import Perplexity
+        
+        agent = Agent(
+            model=Perplexity(id=self.model_id),
+            tools=self.tools.as_agent_tools(),
             markdown=True
         )
         
         # Adiciona o prompt do sistema como contexto adicional
-        self.agent.additional_context = self.system_prompt
+        agent.additional_context = self.system_prompt
+        
+        self.init_timings["agent"] = round(time.perf_counter() - started, 3)
+        return agent
+    
     def get_forex_data(self, symbol: str, timeframe: str = '1d', days_back: int = 2) -> Dict[str, Any]:
         """
         Obtém dados Forex usando o agente
         
         Args:
             symbol (str): Par de moedas (ex: 'EURUSD')
-            timeframe (str): Intervalo de tempo ('1h', '4h', '1d')
+            timeframe (str): Intervalo de tempo ('1h', '2h', '4h', '1d', '1wk')
             days_back (int): Número de dias para retornar
             
         Returns:
-            Dict: Dados Forex
+            Dict: Símbolo, timeframe e "frame" (OHLCFrame com barras de dias úteis e
+                indicadores), compartilhado por tabela, gráfico e resumo
         """
         # Usa diretamente a ferramenta para obter os dados
         # Isso é mais eficiente do que passar pelo LLM para dados brutos
-        data = self.tools.data_provider.get_ohlc_data(symbol, timeframe, days_back)
+        frame = self.tools.data_provider.get_ohlc_frame(symbol, timeframe, days_back)
         
-        if data.empty:
+        if frame.empty:
             return {"error": f"Não foi possível obter dados para {symbol}"}
         
-        # Converte o DataFrame para o formato JSON
-        data_json = data.reset_index().to_dict(orient='records')
-        
         return {
             "symbol": symbol,
             "timeframe": timeframe,
-            "data": data_json
+            "frame": frame
         }
     
+    async def get_forex_data_async(self, symbol: str, timeframe: str = '1d', days_back: int = 2) -> Dict[str, Any]:
+        """
+        Versão assíncrona de get_forex_data
+        
+        O download e a conversão dos dados rodam no pool de threads do provedor,
+        sem bloquear o event loop do servidor web.
+        """
+        return await self.tools.data_provider.executor.run(self.get_forex_data, symbol, timeframe, days_back)
+    
     def get_available_pairs(self) -> List[str]:
         """Retorna a lista de pares de moedas disponíveis"""
         return self.tools.data_provider.get_available_pairs()
     
-    def analyze_market(self, symbol: str, timeframe: str = '1d') -> str:
+    def scan_market(self, timeframe: str = '1d', window: int = 20) -> Dict[str, Any]:
+        """
+        Executa o scanner de mercado sobre todos os pares Forex e ativos B3
+        
+        Args:
+            timeframe (str): Intervalo de tempo ('1h', '2h', '4h', '1d', '1wk')
+            window (int): Número de barras das métricas e da correlação
+            
+        Returns:
+            Dict: Métricas por ativo e matriz de correlação dos retornos
+        """
+        return self.tools.data_provider.scanner.scan(timeframe=timeframe, window=window)
+    
+    async def scan_market_async(self, timeframe: str = '1d', window: int = 20) -> Dict[str, Any]:
+        """Versão assíncrona de scan_market, executada no pool de threads do provedor"""
+        return await self.tools.data_provider.executor.run(self.scan_market, timeframe, window)
+    
+    def get_window_stats(self, symbol: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Obtém variação, range, volatilidade realizada e ATR de 1d, 5d, 20d e no ano
+        
+        Args:
+            symbol (str): Par de moedas (ex: 'EURUSD') ou ativo B3 (ex: 'WINFUT')
+            
+        Returns:
+            Tuple[Dict, str]: Métricas por horizonte e versão das barras diárias
+                usadas (vazio e None se os dados não estiverem disponíveis)
+        """
+        try:
+            return self.tools.data_provider.get_window_stats(symbol)
+        except Exception as e:
+            print(f"Erro ao calcular o resumo de {symbol}: {e}")
+            return {}, None
+    
+    async def get_window_stats_async(self, symbol: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Versão assíncrona de get_window_stats, executada no pool de threads do provedor"""
+        return await self.tools.data_provider.executor.run(self.get_window_stats, symbol)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Retorna os contadores do cache de dados de mercado"""
+        return self.tools.data_provider.cache_stats()
+    
+    def _data_fingerprint(self, symbol: str, timeframe: str) -> str:
+        """
+        Calcula a impressão digital das barras fechadas mais recentes de um ativo
+        
+        Duas análises com a mesma impressão digital foram geradas sobre os mesmos dados.
+        A última barra, ainda em formação durante o pregão, fica de fora: a impressão
+        digital só muda quando uma barra fecha, não a cada novo preço.
+        """
+        data = self.tools.data_provider.get_ohlc_data(symbol, timeframe)
+        if len(data) < 2:
+            return "empty"
+        
+        recent = data.iloc[:-1].tail(self.FINGERPRINT_BARS)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(recent.index.as_unit('ns').asi8.tobytes())
+        digest.update(np.ascontiguousarray(recent.to_numpy(dtype=np.float64)).tobytes())
+        return digest.hexdigest()
+    
+    def analyze_market(self, symbol: str, timeframe: str = '1d', allow_stale: bool = True) -> str:
         """
         Solicita ao agente uma análise do mercado para um par específico
         
+        Se os dados não mudaram desde a última análise do mesmo par, timeframe e
+        modelo, a análise armazenada é retornada sem chamar o modelo. Se mudaram,
+        a análise anterior pode ser retornada enquanto uma nova é gerada em
+        segundo plano.
+        
         Args:
             symbol (str): Par de moedas (ex: 'EURUSD')
-            timeframe (str): Intervalo de tempo ('1h', '4h', '1d')
+            timeframe (str): Intervalo de tempo ('1h', '2h', '4h', '1d', '1wk')
+            allow_stale (bool): Permite retornar uma análise desatualizada enquanto
+                a nova é gerada em segundo plano
             
         Returns:
             str: Análise do mercado
         """
-        prompt = f"""
+        fingerprint = self._data_fingerprint(symbol, timeframe)
+        
+        if self.analysis_cache is not None:
+            cached = self.analysis_cache.get(symbol, timeframe, self.model_id, fingerprint)
+            if cached is not None and cached.fresh:
+                return cached.analysis
+            if cached is not None and allow_stale:
+                self._refresh_in_background(symbol, timeframe, fingerprint)
+                return cached.analysis
+        
+        return self._generate_analysis(symbol, timeframe, fingerprint)
+    
+    def _analysis_prompt(self, symbol: str, timeframe: str) -> str:
+        """Monta o pedido de análise enviado ao modelo"""
+        return f"""
         Faça uma análise rápida do par {symbol} no timeframe {timeframe}.
         Utilize os dados disponíveis para fornecer insights sobre o movimento recente do preço.
         """
+    
+    def _generate_analysis(self, symbol: str, timeframe: str, fingerprint: str) -> str:
+        """Gera uma nova análise com o modelo e a armazena no cache"""
+        prompt = self._analysis_prompt(symbol, timeframe)
         
         # Aqui usamos o LLM para gerar uma análise baseada nos dados
-        response = self.agent.generate_response(prompt)
-        return response
+        self.rate_limiter.acquire()
+        response = self.agent.run(prompt)
+        analysis = response.content if isinstance(response.content, str) else str(response.content)
+        
+        if self.analysis_cache is not None:
+            self.analysis_cache.put(symbol, timeframe, self.model_id, fingerprint, analysis)
+        return analysis
+    
+    async def stream_analysis(self, symbol: str, timeframe: str = '1d') -> AsyncIterator[str]:
+        """
+        Gera uma análise do mercado entregando o texto à medida que o modelo o escreve
+        
+        Se houver uma análise atual no cache para os mesmos dados, ela é entregue de
+        uma vez. Se o consumidor interromper a iteração (ex: cliente desconectado),
+        a geração no modelo é cancelada e nada é armazenado.
+        
+        Args:
+            symbol (str): Par de moedas (ex: 'EURUSD') ou ativo B3 (ex: 'WINFUT')
+            timeframe (str): Intervalo de tempo ('1h', '2h', '4h', '1d', '1wk')
+            
+        Yields:
+            str: Trechos da análise
+        """
+        executor = self.tools.data_provider.executor
+        fingerprint = await executor.run(self._data_fingerprint, symbol, timeframe)
+        
+        if self.analysis_cache is not None:
+            cached = await executor.run(self.analysis_cache.get, symbol, timeframe, self.model_id, fingerprint)
+            if cached is not None and cached.fresh:
+                yield cached.analysis
+                return
+        
+        # Espera pela vez no event loop: o pool do provedor fica livre para as páginas
+        await self.rate_limiter.acquire_async()
+        
+        # A criação do agente (primeiro uso) importa o agno: fora do event loop
+        agent = await executor.run(getattr, self, 'agent')
+        from agno.run.agent import RunContentEvent
+        
+        chunks = []
+        stream = agent.arun(self._analysis_prompt(symbol, timeframe), stream=True)
+        try:
+            async for event in stream:
+                if isinstance(event, RunContentEvent) and isinstance(event.content, str) and event.content:
+                    chunks.append(event.content)
+                    yield event.content
+        finally:
+            # Encerra a requisição ao modelo também quando o consumidor desiste
+            await stream.aclose()
+        
+        if self.analysis_cache is not None and chunks:
+            await executor.run(self.analysis_cache.put, symbol, timeframe, self.model_id, fingerprint, "".join(chunks))
+    
+    def _refresh_in_background(self, symbol: str, timeframe: str, fingerprint: str):
+        """Agenda a geração de uma nova análise, se ainda não houver uma em andamento"""
+        key = (symbol, timeframe)
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def refresh():
+            try:
+                self._generate_analysis(symbol, timeframe, fingerprint)
+            except Exception as e:
+                print(f"Erro ao atualizar análise de {symbol}: {e}")
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+        
+        self._refresh_executor.submit(refresh)
+    
+    def analyze_markets(self, symbols: Optional[List[str]] = None, timeframe: str = '1d', max_concurrency: Optional[int] = None, allow_stale: bool = True) -> Dict[str, Any]:
+        """
+        Analisa vários ativos em paralelo
+        
+        Os dados de todos os ativos são obtidos antes, em uma única consulta à
+        fonte de dados; as análises rodam em paralelo, limitadas por
+        max_concurrency e pelo limite de chamadas por minuto ao provedor.
+        
+        Args:
+            symbols (List[str], opcional): Ativos a analisar. Se não informado,
+                analisa todos os pares Forex e os ativos B3
+            timeframe (str): Intervalo de tempo ('1h', '2h', '4h', '1d', '1wk')
+            max_concurrency (int, opcional): Número máximo de análises simultâneas
+            allow_stale (bool): Permite retornar análises desatualizadas do cache
+            
+        Returns:
+            Dict: Análise ou erro de cada ativo, com o tempo gasto em cada um e no total
+        """
+        provider = self.tools.data_provider
+        if symbols is None:
+            symbols = provider.get_available_pairs() + provider.b3_assets
+        symbols = list(dict.fromkeys(symbols))
+        
+        started = time.perf_counter()
+        
+        # Pré-carrega os dados de todos os ativos no cache em uma única consulta
+        # (símbolos inválidos são reportados individualmente pela análise)
+        try:
+            provider.get_ohlc_data_many(symbols, timeframe)
+        except Exception as e:
+            print(f"Erro ao pré-carregar dados para análise: {e}")
+        prefetch_seconds = time.perf_counter() - started
+        
+        def analyze(symbol):
+            symbol_started = time.perf_counter()
+            try:
+                result = {"analysis": self.analyze_market(symbol, timeframe, allow_stale=allow_stale)}
+            except Exception as e:
+                print(f"Erro ao analisar {symbol}: {e}")
+                result = {"error": str(e)}
+            result["seconds"] = round(time.perf_counter() - symbol_started, 3)
+            return symbol, result
+        
+        workers = max(1, min(max_concurrency or self.max_concurrency, len(symbols) or 1))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis") as pool:
+            results = dict(pool.map(analyze, symbols))
+        
+        return {
+            "timeframe": timeframe,
+            "results": results,
+            "failed": [symbol for symbol, result in results.items() if "error" in result],
+            "prefetch_seconds": round(prefetch_seconds, 3),
+            "total_seconds": round(time.perf_counter() - started, 3)
+        }
     
     def get_asset_info(self, symbol: str) -> Dict[str, Any]:
         """
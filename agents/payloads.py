@@ -0,0 +1,91 @@
+import json
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from data.indicators import compute_indicators, latest_values
+from data.resample import downsample_ohlc
+
+# Estimativa grosseira de caracteres por token do modelo
+CHARS_PER_TOKEN = 4
+
+
+def price_decimals(price: float) -> int:
+    """Casas decimais suficientes para ~6 dígitos significativos (1.08123, 151.234, 130512)"""
+    if not price or not math.isfinite(price):
+        return 5
+    return max(0, 5 - int(math.floor(math.log10(abs(price)))))
+
+
+def _estimate_tokens(value: Any) -> int:
+    """Estima quantos tokens um valor ocupa quando serializado em JSON"""
+    return len(json.dumps(value, separators=(',', ':'), default=str)) // CHARS_PER_TOKEN + 1
+
+
+def build_compact_payload(data: pd.DataFrame, symbol: str, timeframe: str, token_budget: int = 1500,
+                          indicators: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """
+    Monta a resposta compacta de uma ferramenta OHLC para o modelo
+
+    Em vez de um dicionário por barra, envia estatísticas resumidas, alguns
+    indicadores calculados sobre a série completa e a série em formato colunar.
+    Se a série não couber no orçamento de tokens, as barras vizinhas são unidas
+    em candles maiores (preservando máximas e mínimas).
+
+    Args:
+        data (pandas.DataFrame): Dados OHLC do ForexDataProvider
+        symbol (str): Par de moedas ou ativo B3
+        timeframe (str): Intervalo de tempo das barras
+        token_budget (int): Número aproximado de tokens disponíveis para a resposta
+        indicators (pandas.DataFrame, opcional): Indicadores já calculados para data
+            (ex: ForexDataProvider.get_indicators). Se não informados, são calculados aqui
+
+    Returns:
+        Dict: Resposta compacta em formato JSON
+    """
+    close = data['close'].to_numpy(dtype=np.float64)
+    high = data['high'].to_numpy(dtype=np.float64)
+    low = data['low'].to_numpy(dtype=np.float64)
+    open_ = data['open'].to_numpy(dtype=np.float64)
+    decimals = price_decimals(float(close[-1]))
+    time_format = "%Y-%m-%d %H:%M" if timeframe.endswith('h') else "%Y-%m-%d"
+
+    payload = {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "summary": {
+            "bars": len(data),
+            "start": data.index[0].strftime(time_format),
+            "end": data.index[-1].strftime(time_format),
+            "open": round(float(open_[0]), decimals),
+            "close": round(float(close[-1]), decimals),
+            "high": round(float(np.nanmax(high)), decimals),
+            "low": round(float(np.nanmin(low)), decimals),
+            "change": round(float(close[-1] - open_[0]), decimals),
+            "change_pct": round(float((close[-1] - open_[0]) / open_[0] * 100), 3)
+        },
+        "indicators": latest_values(indicators if indicators is not None else compute_indicators(data), decimals)
+    }
+
+    # Orçamento restante para a série, estimado pelo tamanho de uma barra
+    remaining = token_budget - _estimate_tokens(payload)
+    tokens_per_bar = _estimate_tokens([data.index[-1].strftime(time_format)] + [round(float(close[-1]), decimals)] * 4)
+    max_bars = remaining // tokens_per_bar if remaining > 0 else 0
+
+    if max_bars < 2:
+        return payload
+
+    series = downsample_ohlc(data, max_bars)
+    payload["series"] = {
+        "t": series.index.strftime(time_format).tolist(),
+        "o": np.round(series['open'].to_numpy(dtype=np.float64), decimals).tolist(),
+        "h": np.round(series['high'].to_numpy(dtype=np.float64), decimals).tolist(),
+        "l": np.round(series['low'].to_numpy(dtype=np.float64), decimals).tolist(),
+        "c": np.round(series['close'].to_numpy(dtype=np.float64), decimals).tolist()
+    }
+    if len(series) < len(data):
+        payload["series"]["merged_bars_per_point"] = round(len(data) / len(series), 1)
+
+    return payload
@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """Limita a taxa de chamadas ao provedor do modelo (balde de fichas, seguro entre threads)"""
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        """
+        Inicializa o limitador
+
+        Args:
+            rate_per_minute (float): Número máximo de chamadas por minuto (0 desativa o limite)
+            burst (int): Número de chamadas que podem ser feitas de uma vez antes do limite
+        """
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Reserva uma ficha e retorna quanto tempo esperar até poder usá-la"""
+        if self.interval == 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) / self.interval)
+            self._updated_at = now
+
+            # Reserva a ficha agora; se faltar, o saldo fica negativo e a espera é proporcional
+            self._tokens -= 1
+            return -self._tokens * self.interval if self._tokens < 0 else 0.0
+
+    def acquire(self) -> float:
+        """
+        Aguarda até que uma chamada seja permitida
+
+        Returns:
+            float: Tempo de espera em segundos
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """
+        Versão assíncrona de acquire: espera no event loop, sem ocupar uma thread
+
+        Returns:
+            float: Tempo de espera em segundos
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
@@ -0,0 +1,93 @@
+import gzip
+import os
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, IdentityResponder
+
+# brotli é opcional: sem ele, as respostas são comprimidas apenas com gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Tamanho mínimo (bytes) para comprimir uma resposta e níveis de compressão
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Codificações aceitas pelo cliente no cabeçalho Accept-Encoding (ignora q=0)"""
+    encodings = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if name and params not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Escolhe a codificação da resposta
+
+    Args:
+        accept_encoding (str): Cabeçalho Accept-Encoding da requisição
+
+    Returns:
+        str: 'br' (se o brotli estiver instalado), 'gzip' ou None
+    """
+    encodings = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in encodings:
+        return "br"
+    if "gzip" in encodings:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Comprime um corpo completo com a codificação escolhida por choose_encoding"""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class BrotliResponder(IdentityResponder):
+    """Comprime a resposta com brotli, inclusive respostas transmitidas em partes"""
+
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int = BROTLI_QUALITY, **kwargs):
+        super().__init__(app, minimum_size, **kwargs)
+        self.quality = quality
+        self._compressor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        if more_body:
+            return self._compressor.process(body) + self._compressor.flush()
+        return self._compressor.process(body) + self._compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compressão brotli ou gzip das respostas HTML e JSON
+
+    Respostas que já têm Content-Encoding (ex: páginas comprimidas uma única vez
+    pelo PageCache) e Server-Sent Events não são recomprimidas.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, compresslevel: int = GZIP_LEVEL, **kwargs):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel, **kwargs)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and brotli is not None:
+            headers = Headers(scope=scope)
+            if choose_encoding(headers.get("Accept-Encoding", "")) == "br":
+                responder = BrotliResponder(self.app, self.minimum_size,
+                                            exclude_content_types=self.exclude_content_types)
+                await responder(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
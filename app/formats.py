@@ -0,0 +1,93 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+from fastapi import Request
+
+# Formatos binários opcionais: sem as bibliotecas, as APIs respondem apenas JSON
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+MEDIA_TYPES = {
+    "json": JSON_MEDIA_TYPE,
+    "msgpack": MSGPACK_MEDIA_TYPE,
+    "arrow": ARROW_MEDIA_TYPE
+}
+
+
+def available_formats() -> list:
+    """Formatos de resposta suportados com as bibliotecas instaladas"""
+    formats = ["json"]
+    if msgpack is not None:
+        formats.append("msgpack")
+    if pa is not None:
+        formats.append("arrow")
+    return formats
+
+
+def negotiate_format(request: Request, requested: Optional[str] = None) -> Optional[str]:
+    """
+    Escolhe o formato da resposta de uma API de dados
+
+    O parâmetro ?format= tem prioridade; sem ele, o cabeçalho Accept decide
+    (application/vnd.apache.arrow.stream, application/msgpack ou JSON).
+
+    Args:
+        request (Request): Requisição atual
+        requested (str, opcional): Valor do parâmetro format ('json', 'msgpack', 'arrow')
+
+    Returns:
+        str: Formato escolhido, ou None se o formato pedido não estiver disponível
+    """
+    formats = available_formats()
+    if requested:
+        return requested if requested in formats else None
+
+    accept = request.headers.get("accept", "")
+    for name in ("arrow", "msgpack"):
+        if MEDIA_TYPES[name] in accept:
+            return name if name in formats else None
+    return "json"
+
+
+def encode_msgpack(payload: Dict[str, Any]) -> bytes:
+    """Serializa o payload (mesma estrutura do JSON) em MessagePack"""
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def encode_arrow(columns: Dict[str, np.ndarray], metadata: Optional[Dict[str, str]] = None) -> bytes:
+    """
+    Serializa colunas de mesmo tamanho como um stream Arrow IPC (um único record batch)
+
+    Colunas datetime64 viram timestamps e os NaN das colunas numéricas viram nulos.
+
+    Args:
+        columns (Dict[str, numpy.ndarray]): Colunas por nome
+        metadata (Dict[str, str], opcional): Metadados gravados no schema
+
+    Returns:
+        bytes: Stream Arrow IPC
+    """
+    arrays = []
+    for values in columns.values():
+        values = np.asarray(values)
+        if values.dtype.kind == "f":
+            arrays.append(pa.array(values, from_pandas=True))
+        else:
+            arrays.append(pa.array(values))
+    batch = pa.RecordBatch.from_arrays(arrays, names=list(columns), metadata=metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
@@ -1,80 +1,130 @@
 from fastapi import FastAPI, Request, Form, UploadFile, File
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 from typing import Optional
 import pandas as pd
-import io
+import numpy as np
 import json
-from datetime import datetime
+from contextlib import aclosing
 
 import sys
 import os
 # Adiciona o diretório raiz ao path para importação dos módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from agents.forex_agent import ForexAgent
-from visualization.table_view import TableView
-from visualization.chart_view import ChartView 
+from app.startup import startup_report, FirstRequestMiddleware
+from app.page_cache import PageCache
+from app.compression import CompressionMiddleware
+from app.formats import MEDIA_TYPES, available_formats, encode_arrow, encode_msgpack, negotiate_format
+from app.uploads import (
+    RESULT_COLUMNS, describe_parse_errors, normalize_results, period_aggregates, read_upload
+)
+
+with startup_report.measure("imports"):
+    from agents.forex_agent import ForexAgent
+    from visualization.table_view import TableView
+    from visualization.chart_view import ChartView 
+    from data.executor import BlockingExecutor
+    from data.dataset_store import DatasetStore
 
 from dotenv import load_dotenv
 
 app = FastAPI(title="Forex Agents")
+app.add_middleware(FirstRequestMiddleware, report=startup_report)
+# Compressão brotli/gzip das respostas HTML e JSON (exceto SSE e respostas já comprimidas)
+app.add_middleware(CompressionMiddleware)
 templates = Jinja2Templates(directory="app/templates")
-
-# Armazenamento temporário dos dados CSV
-uploaded_data_store = {}
+# Arquivos estáticos (script do gráfico), armazenados em cache pelo navegador
+app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 # Carrega variáveis de ambiente (.env)
 load_dotenv()
 
 # Inicializa os componentes com configuração via ambiente
+# (o modelo e as bibliotecas pesadas, como o agno, são carregados no primeiro uso)
 MODEL_ID = os.getenv("MODEL_ID", "llama-3.1-sonar-small-128k-online")
-forex_agent = ForexAgent(model_id=MODEL_ID)
-table_view = TableView()
-chart_view = ChartView()
+with startup_report.measure("componentes"):
+    forex_agent = ForexAgent(model_id=MODEL_ID)
+    table_view = TableView()
+    chart_view = ChartView()
 
-@app.get("/", response_class=HTMLResponse)
-async def index(request: Request):
-    """Rota principal da aplicação"""
-    # Obtém a lista de pares disponíveis
-    available_pairs = forex_agent.get_available_pairs()
-    
-    # Define valores padrão
-    selected_symbol = "EURUSD"
-    timeframe = "1d"
-    days_back = 2
+# Pool de threads para a geração de tabelas e gráficos (CPU) fora do event loop
+render_executor = BlockingExecutor(int(os.getenv("RENDER_MAX_WORKERS", "4")), "forex-render")
+
+# Páginas e fragmentos renderizados, por parâmetros e versão dos dados (ETag e 304)
+page_cache = PageCache()
+
+# Dados enviados em /upload, gravados em disco (sobrevivem a reinícios e são compartilhados entre workers)
+dataset_store = DatasetStore(os.getenv("DATASET_STORE_DIR", os.path.join(".cache", "datasets")))
+
+@app.on_event("startup")
+def start_quote_service():
+    """Inicia a atualização das cotações em segundo plano"""
+    forex_agent.tools.data_provider.start_quote_service()
+
+@app.on_event("startup")
+def report_startup():
+    """Exibe o tempo de importação e inicialização da aplicação"""
+    startup_report.mark_ready()
+    startup_report.print_report()
+
+@app.on_event("shutdown")
+def shutdown_executors():
+    """Encerra os pools de threads e o serviço de cotações ao desligar o servidor"""
+    forex_agent.tools.data_provider.stop_quote_service()
+    render_executor.shutdown(wait=False)
+    forex_agent.tools.data_provider.executor.shutdown(wait=False)
+
+def _render_template(name: str, context: dict) -> str:
+    """Renderiza um template sem vínculo com a requisição (o resultado pode ser reaproveitado)"""
+    return templates.get_template(name).render(context)
+
+async def render_dashboard(request: Request, symbol: str, timeframe: str, days_back: int) -> Response:
+    """
+    Renderiza o dashboard Forex pelo cache de páginas
     
+    A página é identificada pelos parâmetros e pelas versões dos dados (barras
+    do timeframe exibido e barras diárias do resumo): enquanto não mudam, o HTML
+    já renderizado é reaproveitado e navegadores que já o têm recebem 304.
+    """
     # Obtém os dados do par selecionado
-    data = forex_agent.get_forex_data(selected_symbol, timeframe, days_back)
+    data = await forex_agent.get_forex_data_async(symbol, timeframe, days_back)
     
-    # Gera a tabela HTML
-    table_html = table_view.get_html_table(data)
+    # Resumo de vários horizontes (1d, 5d, 20d e no ano), calculado das barras diárias
+    window_stats, stats_version = await forex_agent.get_window_stats_async(symbol)
     
-    # Gera o gráfico HTML
-    chart_html = chart_view.get_html_chart(data)
-    
-    # Obtém estatísticas resumidas
-    stats = table_view.get_summary_stats(data)
+    def render():
+        # Obtém estatísticas resumidas
+        stats = table_view.get_summary_stats(data)
+        
+        return _render_template(
+            "index.html",
+            {
+                "available_pairs": forex_agent.get_available_pairs(),
+                "selected_symbol": symbol,
+                "timeframe": timeframe,
+                "days_back": days_back,
+                "stats": stats,
+                "window_stats": window_stats,
+                "asset_info": forex_agent.get_asset_info(symbol)
+            }
+        )
     
-    # Obtém informações do ativo
-    asset_info = forex_agent.get_asset_info(selected_symbol)
+    if "error" in data or not window_stats:
+        # Erros e resumos indisponíveis não são mantidos em cache: a próxima requisição tenta novamente
+        return HTMLResponse(await render_executor.run(render))
     
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "available_pairs": available_pairs,
-            "selected_symbol": selected_symbol,
-            "timeframe": timeframe,
-            "days_back": days_back,
-            "table_html": table_html,
-            "chart_html": chart_html,
-            "stats": stats,
-            "asset_info": asset_info
-        }
-    )
+    key = ("index", symbol, timeframe, days_back, data["frame"].version, stats_version)
+    page = await render_executor.run(page_cache.get_or_render, key, render)
+    return page_cache.respond(request, page)
+
+@app.get("/", response_class=HTMLResponse)
+async def index(request: Request):
+    """Rota principal da aplicação"""
+    # Valores padrão (EURUSD, diário, 2 dias): a mesma página para todos os visitantes
+    return await render_dashboard(request, "EURUSD", "1d", 2)
 
 @app.post("/", response_class=HTMLResponse)
 async def update_data(
@@ -84,38 +134,7 @@ async def update_data(
     days_back: int = Form(...)
 ):
     """Atualiza os dados com base nos parâmetros selecionados"""
-    # Obtém a lista de pares disponíveis
-    available_pairs = forex_agent.get_available_pairs()
-    
-    # Obtém os dados do par selecionado
-    data = forex_agent.get_forex_data(symbol, timeframe, days_back)
-    
-    # Gera a tabela HTML
-    table_html = table_view.get_html_table(data)
-    
-    # Gera o gráfico HTML
-    chart_html = chart_view.get_html_chart(data)
-    
-    # Obtém estatísticas resumidas
-    stats = table_view.get_summary_stats(data)
-    
-    # Obtém informações do ativo
-    asset_info = forex_agent.get_asset_info(symbol)
-    
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "available_pairs": available_pairs,
-            "selected_symbol": symbol,
-            "timeframe": timeframe,
-            "days_back": days_back,
-            "table_html": table_html,
-            "chart_html": chart_html,
-            "stats": stats,
-            "asset_info": asset_info
-        }
-    )
+    return await render_dashboard(request, symbol, timeframe, days_back)
 
 @app.get("/upload", response_class=HTMLResponse)
 async def upload_page(request: Request):
@@ -129,6 +148,9 @@ async def upload_page(request: Request):
         }
     )
 
+# Linhas exibidas na pré-visualização após o upload
+UPLOAD_PREVIEW_ROWS = int(os.getenv("UPLOAD_PREVIEW_ROWS", "100"))
+
 @app.post("/upload", response_class=HTMLResponse)
 async def process_upload(
     request: Request,
@@ -144,66 +166,25 @@ async def process_upload(
         if not file.filename.lower().endswith(('.csv', '.xlsx', '.xls')):
             raise ValueError("Formato de arquivo não suportado. Use CSV ou Excel (.xlsx, .xls)")
         
-        # Lê o conteúdo do arquivo
-        contents = await file.read()
-        
-        # Processa o arquivo baseado na extensão
-        if file.filename.lower().endswith('.csv'):
-            # Tenta diferentes encodings e separadores para CSV
-            content_str = None
-            for encoding in ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']:
-                try:
-                    content_str = contents.decode(encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if content_str is None:
-                raise ValueError("Não foi possível decodificar o arquivo CSV. Verifique a codificação do arquivo.")
-            
-            # Tenta diferentes separadores
-            df = None
-            separators = [',', ';', '\t', '|']
-            for sep in separators:
-                try:
-                    df = pd.read_csv(
-                        io.StringIO(content_str), 
-                        sep=sep,
-                        on_bad_lines='skip',  # Pula linhas problemáticas
-                        skipinitialspace=True,  # Remove espaços extras
-                        encoding_errors='ignore'  # Ignora erros de encoding
-                    )
-                    # Verifica se o DataFrame tem pelo menos 2 colunas (indicando separação correta)
-                    if len(df.columns) >= 2:
-                        break
-                except Exception:
-                    continue
-            
-            if df is None or len(df.columns) < 2:
-                raise ValueError("Não foi possível processar o arquivo CSV. Verifique se o arquivo está formatado corretamente com separadores válidos (vírgula, ponto e vírgula, tab ou pipe).")
-        else:
-            df = pd.read_excel(io.BytesIO(contents))
-        
-        # Colunas obrigatórias
-        required_columns = [
-            'data', 'min_pts_gain', 'max_pts_gain', 
-            'min_pts_stop', 'max_pts_stop', 'min_resultado', 'max_resultado'
-        ]
+        # Lê o arquivo uma única vez a partir do arquivo temporário do upload
+        # (codificação, separador e colunas detectados por uma amostra do início)
+        df, read_info = await render_executor.run(read_upload, file.file, file.filename, RESULT_COLUMNS)
         
-        # Verifica se todas as colunas obrigatórias estão presentes
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(missing_columns)}")
+        # Converte uma única vez para colunas tipadas ordenadas por data (erros de conversão são informados)
+        processed_data, parse_report = await render_executor.run(normalize_results, df)
         
-        # Processa os dados (aqui você pode adicionar lógica específica)
-        processed_data = df[required_columns].copy()
+        # Consolidado de lucro e perda por período, calculado uma vez e guardado com os dados
+        aggregates = await render_executor.run(period_aggregates, processed_data)
         
-        # Armazena os dados processados temporariamente
-        data_id = f"data_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        uploaded_data_store[data_id] = processed_data.to_dict('records')
+        # Armazena os dados processados (identificador único por upload)
+        data_id = await render_executor.run(
+            dataset_store.save, processed_data, file.filename, {"consolidado_periodo": aggregates}
+        )
         
-        # Converte para HTML para exibição
-        table_html = processed_data.to_html(classes='table table-striped table-hover', table_id='uploaded-data')
+        # Pré-visualização das primeiras linhas dos dados já convertidos e ordenados
+        # (arquivos grandes não são renderizados inteiros)
+        preview = processed_data.head(UPLOAD_PREVIEW_ROWS)
+        table_html = preview.to_html(classes='table table-striped table-hover', table_id='uploaded-data')
         
         return templates.TemplateResponse(
             "upload.html",
@@ -212,11 +193,14 @@ async def process_upload(
                 "message": f"✅ Arquivo '{file.filename}' processado com sucesso! {len(processed_data)} registros carregados.",
                 "error": None,
                 "table_html": table_html,
+                "preview_rows": len(preview),
                 "data_summary": {
                     "filename": file.filename,
                     "rows": len(processed_data),
                     "columns": len(processed_data.columns),
-                    "separator_used": "Detectado automaticamente" if file.filename.lower().endswith('.csv') else "N/A",
+                    "separator": read_info["separator"],
+                    "encoding": read_info["encoding"],
+                    "parse_errors": describe_parse_errors(parse_report),
                     "data_id": data_id  # ID para acessar os gráficos
                 }
             }
@@ -264,7 +248,8 @@ async def process_upload(
 @app.get("/charts/{data_id}", response_class=HTMLResponse)
 async def charts_page(request: Request, data_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None):
     """Página de visualização de gráficos dos dados CSV"""
-    if data_id not in uploaded_data_store:
+    stored = await render_executor.run(dataset_store.load, data_id)
+    if stored is None:
         return templates.TemplateResponse(
             "upload.html",
             {
@@ -274,20 +259,14 @@ async def charts_page(request: Request, data_id: str, start_date: Optional[str]
             }
         )
     
-    # Recupera os dados
-    data = pd.DataFrame(uploaded_data_store[data_id]).copy()
-    
-    # Converte a coluna de data
-    data['data'] = pd.to_datetime(data['data'], errors='coerce')
-    
-    # Aplica filtros de data se fornecidos
+    # Os dados já estão tipados e ordenados por data: o filtro é uma busca binária (sem cópia)
+    dates = stored['data'].to_numpy()
+    first, last = 0, len(stored)
     if start_date:
-        data = data[data['data'] >= pd.to_datetime(start_date)]
+        first = int(np.searchsorted(dates, pd.to_datetime(start_date).to_datetime64(), side='left'))
     if end_date:
-        data = data[data['data'] <= pd.to_datetime(end_date)]
-    
-    # Remove linhas com datas inválidas
-    data = data.dropna(subset=['data'])
+        last = int(np.searchsorted(dates, pd.to_datetime(end_date).to_datetime64(), side='right'))
+    data = stored.iloc[first:max(first, last)]
     
     # Preparar dados para os gráficos
     chart_data = {
@@ -303,114 +282,60 @@ async def charts_page(request: Request, data_id: str, start_date: Optional[str]
     }
     
     if len(data) > 0:
-        # Converte colunas numéricas e trata valores NaN como zero
-        numeric_columns = ['max_pts_gain', 'min_pts_gain', 'max_pts_stop', 'min_pts_stop', 'min_resultado', 'max_resultado']
-        for col in numeric_columns:
-            if col in data.columns:
-                data[col] = pd.to_numeric(data[col], errors='coerce').fillna(0)
+        # 1. HISTÓRICO DO RESULTADO (gráfico de linha)
+        # Eixo X = data (ordenada), Eixo Y = min_resultado e max_resultado
+        # Também gerar linha acumulada: resultado_acumulado[i] = soma(resultado_dia[0..i])
+        datas = data['data'].dt.strftime('%Y-%m-%d').tolist()
         
-        # Ordena por data para cálculos corretos
-        data_clean = data.sort_values('data').copy()
+        # Calcular resultado acumulado usando max_resultado
+        resultado_acumulado = data['max_resultado'].cumsum()
         
-        if len(data_clean) > 0:
-            # 1. HISTÓRICO DO RESULTADO (gráfico de linha)
-            # Eixo X = data (ordenada), Eixo Y = min_resultado e max_resultado
-            # Também gerar linha acumulada: resultado_acumulado[i] = soma(resultado_dia[0..i])
-            historico_data = data_clean[['data', 'min_resultado', 'max_resultado']].copy()
-            historico_data = historico_data.sort_values('data')
-            
-            # Calcular resultado acumulado usando max_resultado
-            historico_data['resultado_acumulado'] = historico_data['max_resultado'].cumsum()
-            
-            chart_data['historico_min_max'] = {
-                'dates': historico_data['data'].dt.strftime('%Y-%m-%d').tolist(),
-                'min_resultado': historico_data['min_resultado'].tolist(),
-                'max_resultado': historico_data['max_resultado'].tolist(),
-                'resultado_acumulado': historico_data['resultado_acumulado'].tolist()
-            }
-            
-            # 2. LUCRO E PERDA (gráfico de barras)
-            # Converter data em datetime, agrupar por período
-            # lucro_total = soma dos resultados positivos (max_resultado > 0)
-            # perda_total = soma dos resultados negativos (max_resultado < 0)
-            data_clean['ano'] = data_clean['data'].dt.year
-            data_clean['mes'] = data_clean['data'].dt.month
-            data_clean['trimestre'] = data_clean['data'].dt.quarter
-            data_clean['semestre'] = ((data_clean['data'].dt.month - 1) // 6) + 1
-            
-            def calcular_lucro_perda_periodo(grupo):
-                lucro_total = grupo[grupo['max_resultado'] > 0]['max_resultado'].sum()
-                perda_total = abs(grupo[grupo['max_resultado'] < 0]['max_resultado'].sum())
-                return pd.Series({'lucro_total': lucro_total, 'perda_total': perda_total})
-            
-            # Mensal
-            mensal = data_clean.groupby(['ano', 'mes']).apply(calcular_lucro_perda_periodo).reset_index()
-            mensal['periodo'] = mensal['ano'].astype(str) + '-' + mensal['mes'].astype(str).str.zfill(2)
-            
-            # Trimestral
-            trimestral = data_clean.groupby(['ano', 'trimestre']).apply(calcular_lucro_perda_periodo).reset_index()
-            trimestral['periodo'] = trimestral['ano'].astype(str) + '-T' + trimestral['trimestre'].astype(str)
-            
-            # Semestral
-            semestral = data_clean.groupby(['ano', 'semestre']).apply(calcular_lucro_perda_periodo).reset_index()
-            semestral['periodo'] = semestral['ano'].astype(str) + '-S' + semestral['semestre'].astype(str)
-            
-            # Anual
-            anual = data_clean.groupby('ano').apply(calcular_lucro_perda_periodo).reset_index()
-            anual['periodo'] = anual['ano'].astype(str)
-            
-            chart_data['consolidado_periodo'] = {
-                'mensal': {
-                    'periodos': mensal['periodo'].tolist(),
-                    'lucros': mensal['lucro_total'].tolist(),
-                    'perdas': mensal['perda_total'].tolist()
-                },
-                'trimestral': {
-                    'periodos': trimestral['periodo'].tolist(),
-                    'lucros': trimestral['lucro_total'].tolist(),
-                    'perdas': trimestral['perda_total'].tolist()
-                },
-                'semestral': {
-                    'periodos': semestral['periodo'].tolist(),
-                    'lucros': semestral['lucro_total'].tolist(),
-                    'perdas': semestral['perda_total'].tolist()
-                },
-                'anual': {
-                    'periodos': anual['periodo'].tolist(),
-                    'lucros': anual['lucro_total'].tolist(),
-                    'perdas': anual['perda_total'].tolist()
-                }
-            }
-            
-            # 3. EFICIÊNCIA DAS OPERAÇÕES (gráfico de pizza)
-            # Contar dias vencedores = número de dias em que max_resultado > 0
-            # Contar dias perdedores = número de dias em que max_resultado <= 0
-            dias_vencedores = len(data_clean[data_clean['max_resultado'] > 0])
-            dias_perdedores = len(data_clean[data_clean['max_resultado'] <= 0])
-            
-            chart_data['eficiencia'] = {
-                'positivos': dias_vencedores,
-                'negativos': dias_perdedores
-            }
-            
-            # 4. RISCO X RETORNO (gráfico de dispersão)
-            # Cada ponto representa 1 dia
-            # Eixo X = min_pts_stop (ou max_pts_stop), Eixo Y = min_pts_gain (ou max_pts_gain)
-            # Usar valores diretos das colunas, adicionar linha Y = X
-            chart_data['dispersao_risco'] = {
-                'min_pts_gain': data_clean['min_pts_gain'].tolist(),
-                'min_pts_stop': data_clean['min_pts_stop'].tolist(),
-                'max_pts_gain': data_clean['max_pts_gain'].tolist(),
-                'max_pts_stop': data_clean['max_pts_stop'].tolist()
-            }
-            
-            # Dados para compatibilidade com gráficos antigos (manter estrutura)
-            chart_data.update({
-                'dates': historico_data['data'].dt.strftime('%Y-%m-%d').tolist(),
-                'lucros': [max(0, x) for x in historico_data['max_resultado']],
-                'perdas': [abs(min(0, x)) for x in historico_data['max_resultado']],
-                'resultados': historico_data['max_resultado'].tolist()
-            })
+        chart_data['historico_min_max'] = {
+            'dates': datas,
+            'min_resultado': data['min_resultado'].tolist(),
+            'max_resultado': data['max_resultado'].tolist(),
+            'resultado_acumulado': resultado_acumulado.tolist()
+        }
+        
+        # 2. LUCRO E PERDA (gráfico de barras)
+        # lucro_total = soma dos resultados positivos (max_resultado > 0)
+        # perda_total = soma dos resultados negativos (max_resultado < 0)
+        # O consolidado de todo o arquivo é calculado no upload; com filtro de
+        # datas, é recalculado (reduções vetorizadas) apenas para o intervalo
+        consolidado = None
+        if not start_date and not end_date:
+            consolidado = dataset_store.read_attrs(data_id).get("consolidado_periodo")
+        chart_data['consolidado_periodo'] = consolidado or period_aggregates(data)
+        
+        # 3. EFICIÊNCIA DAS OPERAÇÕES (gráfico de pizza)
+        # Contar dias vencedores = número de dias em que max_resultado > 0
+        # Contar dias perdedores = número de dias em que max_resultado <= 0
+        dias_vencedores = len(data[data['max_resultado'] > 0])
+        dias_perdedores = len(data[data['max_resultado'] <= 0])
+        
+        chart_data['eficiencia'] = {
+            'positivos': dias_vencedores,
+            'negativos': dias_perdedores
+        }
+        
+        # 4. RISCO X RETORNO (gráfico de dispersão)
+        # Cada ponto representa 1 dia
+        # Eixo X = min_pts_stop (ou max_pts_stop), Eixo Y = min_pts_gain (ou max_pts_gain)
+        # Usar valores diretos das colunas, adicionar linha Y = X
+        chart_data['dispersao_risco'] = {
+            'min_pts_gain': data['min_pts_gain'].tolist(),
+            'min_pts_stop': data['min_pts_stop'].tolist(),
+            'max_pts_gain': data['max_pts_gain'].tolist(),
+            'max_pts_stop': data['max_pts_stop'].tolist()
+        }
+        
+        # Dados para compatibilidade com gráficos antigos (manter estrutura)
+        chart_data.update({
+            'dates': datas,
+            'lucros': [max(0, x) for x in data['max_resultado']],
+            'perdas': [abs(min(0, x)) for x in data['max_resultado']],
+            'resultados': data['max_resultado'].tolist()
+        })
     
     # Se não houver dados suficientes, criar dados de exemplo
     if not chart_data['dates']:
@@ -434,53 +359,36 @@ async def charts_page(request: Request, data_id: str, start_date: Optional[str]
         }
     )
 
-@app.get("/b3", response_class=HTMLResponse)
-async def b3_page(request: Request):
-    """Página para visualização de ativos da B3"""
-    # Lista de ativos da B3 disponíveis
-    b3_assets = ["WINFUT", "WDOFUT"]
-    
-    # Dados padrão para WINFUT
-    selected_asset = "WINFUT"
-    timeframe = "1d"
-    days_back = 7
+# Ativos da B3 disponíveis na página /b3
+B3_ASSETS = ["WINFUT", "WDOFUT"]
+
+async def render_b3(request: Request, asset: str, timeframe: str, days_back: int) -> Response:
+    """Renderiza a página de ativos B3 pelo cache de páginas (ver render_dashboard)"""
+    context = {
+        "available_assets": B3_ASSETS,
+        "selected_asset": asset,
+        "timeframe": timeframe,
+        "days_back": days_back
+    }
     
     try:
         # Obtém dados do ativo selecionado
-        data = forex_agent.get_forex_data(selected_asset, timeframe, days_back)
-        
-        # Gera a tabela HTML
-        table_html = table_view.get_html_table(data)
-        
-        # Gera o gráfico HTML
-        chart_html = chart_view.get_html_chart(data)
-        
-        return templates.TemplateResponse(
-            "b3.html",
-            {
-                "request": request,
-                "available_assets": b3_assets,
-                "selected_asset": selected_asset,
-                "timeframe": timeframe,
-                "days_back": days_back,
-                "table_html": table_html,
-                "chart_html": chart_html
-            }
-        )
+        data = await forex_agent.get_forex_data_async(asset, timeframe, days_back)
     except Exception as e:
-        return templates.TemplateResponse(
-            "b3.html",
-            {
-                "request": request,
-                "available_assets": b3_assets,
-                "selected_asset": selected_asset,
-                "timeframe": timeframe,
-                "days_back": days_back,
-                "error": f"Erro ao carregar dados: {str(e)}",
-                "table_html": "",
-                "chart_html": ""
-            }
-        )
+        return HTMLResponse(_render_template("b3.html", {**context, "error": f"Erro ao carregar dados: {str(e)}"}))
+    
+    if "error" in data:
+        return HTMLResponse(_render_template("b3.html", {**context, "error": data["error"]}))
+    
+    key = ("b3", asset, timeframe, days_back, data["frame"].version)
+    page = await render_executor.run(page_cache.get_or_render, key, lambda: _render_template("b3.html", context))
+    return page_cache.respond(request, page)
+
+@app.get("/b3", response_class=HTMLResponse)
+async def b3_page(request: Request):
+    """Página para visualização de ativos da B3"""
+    # Dados padrão para WINFUT
+    return await render_b3(request, "WINFUT", "1d", 7)
 
 @app.post("/b3", response_class=HTMLResponse)
 async def update_b3_data(
@@ -490,44 +398,177 @@ async def update_b3_data(
     days_back: int = Form(...)
 ):
     """Atualiza dados dos ativos da B3"""
-    b3_assets = ["WINFUT", "WDOFUT"]
+    return await render_b3(request, asset, timeframe, days_back)
+
+# Timeframes aceitos pelas APIs de dados e pelo scanner de mercado
+TIMEFRAMES = ["1h", "2h", "4h", "1d", "1wk"]
+SCANNER_TIMEFRAMES = TIMEFRAMES
+SCANNER_MAX_WINDOW = 250
+OHLC_MAX_DAYS = 365
+OHLC_MIN_POINTS = 50
+OHLC_MAX_POINTS = 10000
+TABLE_MAX_ROWS = 500
+
+@app.get("/api/ohlc/{symbol}")
+async def ohlc_api(request: Request, symbol: str, timeframe: str = "1d", days_back: int = 2,
+                   start: Optional[int] = None, end: Optional[int] = None, max_points: Optional[int] = None,
+                   format: Optional[str] = None):
+    """
+    Dados do gráfico em arrays colunares (horário, OHLC e sobreposições), desenhado no navegador
     
+    start/end (ms desde a época) limitam o intervalo visível ao aproximar o gráfico;
+    com mais barras que max_points, candles vizinhos são unidos. O formato (JSON,
+    MessagePack ou Arrow IPC) é escolhido por ?format= ou pelo cabeçalho Accept.
+    """
+    if timeframe not in TIMEFRAMES:
+        return JSONResponse({"error": f"Timeframe {timeframe} não suportado"}, status_code=400)
+    fmt = negotiate_format(request, format)
+    if fmt is None:
+        return JSONResponse({"error": f"Formato não disponível (disponíveis: {', '.join(available_formats())})"},
+                            status_code=406)
+    if max_points is not None:
+        max_points = max(OHLC_MIN_POINTS, min(max_points, OHLC_MAX_POINTS))
+    
+    days_back = max(1, min(days_back, OHLC_MAX_DAYS))
     try:
-        # Obtém dados do ativo selecionado
-        data = forex_agent.get_forex_data(asset, timeframe, days_back)
-        
-        # Gera a tabela HTML
-        table_html = table_view.get_html_table(data)
-        
-        # Gera o gráfico HTML
-        chart_html = chart_view.get_html_chart(data)
-        
-        return templates.TemplateResponse(
-            "b3.html",
-            {
-                "request": request,
-                "available_assets": b3_assets,
-                "selected_asset": asset,
-                "timeframe": timeframe,
-                "days_back": days_back,
-                "table_html": table_html,
-                "chart_html": chart_html
-            }
-        )
+        data = await forex_agent.get_forex_data_async(symbol, timeframe, days_back)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
+    
+    if "error" in data:
+        return JSONResponse({"error": data["error"]}, status_code=404)
+    
+    def render():
+        if fmt == "arrow":
+            chart = chart_view.get_chart_columns(data, start, end, max_points)
+            return encode_arrow(chart["columns"], chart["metadata"])
+        if fmt == "msgpack":
+            return encode_msgpack(chart_view.get_chart_payload(data, start, end, max_points))
+        return chart_view.get_chart_json(data, start, end, max_points)
+    
+    key = ("ohlc", symbol, timeframe, days_back, start, end, max_points, fmt, data["frame"].version)
+    page = await render_executor.run(page_cache.get_or_render, key, render, MEDIA_TYPES[fmt])
+    return page_cache.respond(request, page, vary="Accept, Accept-Encoding")
+
+@app.get("/api/table/{symbol}")
+async def table_api(request: Request, symbol: str, timeframe: str = "1d", days_back: int = 2,
+                    offset: int = 0, limit: int = 100, sort: str = "time", order: str = "asc",
+                    format: Optional[str] = None):
+    """
+    Página da tabela OHLC ordenada no servidor (apenas as linhas pedidas são serializadas)
+    
+    O formato (JSON, MessagePack ou Arrow IPC) é escolhido por ?format= ou pelo cabeçalho Accept.
+    """
+    if timeframe not in TIMEFRAMES:
+        return JSONResponse({"error": f"Timeframe {timeframe} não suportado"}, status_code=400)
+    fmt = negotiate_format(request, format)
+    if fmt is None:
+        return JSONResponse({"error": f"Formato não disponível (disponíveis: {', '.join(available_formats())})"},
+                            status_code=406)
+    if sort not in TableView.SORT_COLUMNS or order not in ("asc", "desc"):
+        return JSONResponse({"error": f"Ordenação {sort} {order} não suportada"}, status_code=400)
+    
+    days_back = max(1, min(days_back, OHLC_MAX_DAYS))
+    try:
+        data = await forex_agent.get_forex_data_async(symbol, timeframe, days_back)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
+    
+    if "error" in data:
+        return JSONResponse({"error": data["error"]}, status_code=404)
+    
+    offset, limit = max(0, offset), max(1, min(limit, TABLE_MAX_ROWS))
+    def render():
+        if fmt == "arrow":
+            table = table_view.get_table_columns(data, offset, limit, sort, order)
+            return encode_arrow(table["columns"], table["metadata"])
+        table = table_view.get_table_page(data, offset, limit, sort, order)
+        if fmt == "msgpack":
+            return encode_msgpack(table)
+        return json.dumps(table, separators=(',', ':'))
+    
+    key = ("table", symbol, timeframe, days_back, offset, limit, sort, order, fmt, data["frame"].version)
+    page = await render_executor.run(page_cache.get_or_render, key, render, MEDIA_TYPES[fmt])
+    return page_cache.respond(request, page, vary="Accept, Accept-Encoding")
+
+@app.get("/scanner", response_class=HTMLResponse)
+async def scanner_page(request: Request, timeframe: str = "1d", window: int = 20):
+    """Scanner de mercado: métricas e correlação de todos os pares e ativos B3"""
+    if timeframe not in SCANNER_TIMEFRAMES:
+        timeframe = "1d"
+    window = max(2, min(window, SCANNER_MAX_WINDOW))
+    
+    try:
+        scan = await forex_agent.scan_market_async(timeframe, window)
     except Exception as e:
-        return templates.TemplateResponse(
-            "b3.html",
-            {
-                "request": request,
-                "available_assets": b3_assets,
-                "selected_asset": asset,
-                "timeframe": timeframe,
-                "days_back": days_back,
-                "error": f"Erro ao carregar dados: {str(e)}",
-                "table_html": "",
-                "chart_html": ""
-            }
-        )
+        scan = {"error": f"Erro ao executar o scanner: {str(e)}"}
+    
+    return templates.TemplateResponse(
+        "scanner.html",
+        {
+            "request": request,
+            "timeframes": SCANNER_TIMEFRAMES,
+            "timeframe": timeframe,
+            "window": window,
+            "scan": scan
+        }
+    )
+
+@app.get("/api/scanner", response_class=JSONResponse)
+async def scanner_api(timeframe: str = "1d", window: int = 20):
+    """Métricas (retorno, volatilidade, posição no range) e matriz de correlação dos ativos"""
+    if timeframe not in SCANNER_TIMEFRAMES:
+        return JSONResponse({"error": f"Timeframe {timeframe} não suportado"}, status_code=400)
+    return await forex_agent.scan_market_async(timeframe, max(2, min(window, SCANNER_MAX_WINDOW)))
+
+@app.get("/api/quotes", response_class=JSONResponse)
+async def quotes_api():
+    """Últimas cotações de todos os pares e ativos B3, lidas da tabela em memória, com a idade de cada uma"""
+    return forex_agent.tools.data_provider.quotes.snapshot()
+
+@app.get("/api/cache/stats", response_class=JSONResponse)
+async def cache_stats():
+    """Contadores do cache de dados de mercado (acertos, falhas, descartes)"""
+    return forex_agent.get_cache_stats()
+
+@app.get("/api/cache/pages", response_class=JSONResponse)
+async def page_cache_stats():
+    """Contadores do cache de páginas renderizadas e respostas 304"""
+    return page_cache.stats()
+
+@app.get("/api/cache/datasets", response_class=JSONResponse)
+async def dataset_store_stats():
+    """Conjuntos de dados enviados em disco e uso do cache em memória"""
+    return dataset_store.stats()
+
+@app.get("/api/startup", response_class=JSONResponse)
+async def startup_stats():
+    """Tempos de importação, inicialização e dos componentes carregados sob demanda"""
+    return startup_report.as_dict(forex_agent=forex_agent.init_timings)
+
+@app.get("/api/analysis/{symbol}/stream")
+async def stream_analysis(request: Request, symbol: str, timeframe: str = "1d"):
+    """Análise do agente transmitida como Server-Sent Events enquanto é gerada"""
+    async def events():
+        # Comentário inicial: o navegador recebe a resposta antes do primeiro token
+        yield ": analise iniciada\n\n"
+        try:
+            async with aclosing(forex_agent.stream_analysis(symbol, timeframe)) as chunks:
+                async for chunk in chunks:
+                    if await request.is_disconnected():
+                        # Sair do bloco fecha o gerador e cancela a geração no modelo
+                        return
+                    yield f"data: {json.dumps({'text': chunk})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            print(f"Erro na análise de {symbol}: {e}")
+            yield f"event: analysis_error\ndata: {json.dumps({'error': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from data.cache import TTLCache
+
+from .compression import COMPRESSION_MIN_SIZE, choose_encoding, compress
+
+
+class CachedPage(NamedTuple):
+    """Página ou fragmento renderizado, com os validadores HTTP"""
+    body: bytes
+    media_type: str
+    etag: str
+    last_modified: float
+    # Corpo comprimido por codificação ('gzip', 'br'), gerado uma vez no primeiro pedido
+    encoded: dict
+
+
+class PageCache:
+    """
+    Cache de páginas e fragmentos renderizados, com ETag e GET condicional
+
+    As chaves incluem os parâmetros da página e a versão dos dados usados para
+    renderizá-la: enquanto os dados não mudam, todos os visitantes recebem o
+    mesmo corpo já pronto, e navegadores que já o têm recebem 304.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None):
+        """
+        Inicializa o cache
+
+        Args:
+            maxsize (int, opcional): Número máximo de entradas. Se não informado,
+                usa PAGE_CACHE_SIZE (padrão 128)
+        """
+        self.cache = TTLCache(maxsize=maxsize or int(os.getenv("PAGE_CACHE_SIZE", "128")))
+
+        # Identifica o processo: templates e código novos após um reinício geram ETags novas
+        self._boot = f"{os.getpid()}-{time.time_ns()}"
+
+        self.not_modified = 0
+
+    def etag(self, key: Hashable) -> str:
+        """ETag forte derivada da chave (parâmetros e versões dos dados)"""
+        digest = hashlib.blake2b(f"{self._boot}|{key!r}".encode(), digest_size=12)
+        return f'"{digest.hexdigest()}"'
+
+    def get_or_render(self, key: Hashable, render: Callable[[], Any],
+                      media_type: str = "text/html; charset=utf-8") -> CachedPage:
+        """
+        Retorna a página em cache ou a renderiza uma única vez
+
+        Args:
+            key: Parâmetros e versões dos dados que determinam o conteúdo
+            render (Callable): Função que gera o corpo (str ou bytes)
+            media_type (str): Tipo do conteúdo
+
+        Returns:
+            CachedPage: Corpo e validadores HTTP
+        """
+        def build():
+            body = render()
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            return CachedPage(body, media_type, self.etag(key), time.time(), {})
+
+        return self.cache.get_or_load(key, build, ttl=None)
+
+    def is_fresh(self, request: Request, etag: str, last_modified: float) -> bool:
+        """
+        Indica se a cópia do navegador ainda é válida (If-None-Match / If-Modified-Since)
+
+        Args:
+            request (Request): Requisição atual
+            etag (str): ETag da representação que seria enviada
+            last_modified (float): Horário de renderização da página
+        """
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or etag in tags
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since).timestamp() >= int(last_modified)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def respond(self, request: Request, page: CachedPage, status_code: int = 200,
+                vary: str = "Accept-Encoding") -> Response:
+        """
+        Responde com a página, ou com 304 se o navegador já tiver esta versão
+
+        O corpo é comprimido (brotli ou gzip, conforme Accept-Encoding) uma única
+        vez por página e codificação; cada representação tem sua própria ETag.
+
+        Args:
+            request (Request): Requisição atual
+            page (CachedPage): Página renderizada
+            status_code (int): Código de status quando o corpo é enviado
+            vary (str): Cabeçalhos da requisição que mudam a representação
+        """
+        encoding = None
+        if len(page.body) >= COMPRESSION_MIN_SIZE:
+            encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+
+        body, etag = page.body, page.etag
+        headers = {"Vary": vary, "Cache-Control": "no-cache"}
+        if encoding is not None:
+            body = page.encoded.get(encoding)
+            if body is None:
+                body = page.encoded[encoding] = compress(page.body, encoding)
+            etag = f'{page.etag[:-1]}-{encoding}"'
+            headers["Content-Encoding"] = encoding
+        headers["ETag"] = etag
+        headers["Last-Modified"] = formatdate(page.last_modified, usegmt=True)
+
+        if request.method in ("GET", "HEAD") and status_code == 200 and self.is_fresh(request, etag, page.last_modified):
+            self.not_modified += 1
+            headers.pop("Content-Encoding", None)
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type=page.media_type, status_code=status_code, headers=headers)
+
+    def stats(self):
+        """Contadores do cache e respostas 304"""
+        return {**self.cache.stats(), "not_modified": self.not_modified}
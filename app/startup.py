@@ -0,0 +1,78 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+
+
+class StartupReport:
+    """Registra o tempo de importação e inicialização dos componentes da aplicação"""
+
+    def __init__(self):
+        """Inicializa o relatório, marcando o início da contagem"""
+        self.started_at = time.perf_counter()
+        self.phases = {}
+        self.ready_after = None
+        self.first_request_after = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, name: str):
+        """
+        Mede o tempo de uma etapa da inicialização
+
+        Args:
+            name (str): Nome da etapa (ex: 'imports', 'componentes')
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(time.perf_counter() - started, 3)
+
+    def mark_ready(self):
+        """Marca o momento em que a aplicação terminou o evento de startup"""
+        self.ready_after = round(time.perf_counter() - self.started_at, 3)
+
+    def mark_first_request(self):
+        """Marca a chegada da primeira requisição (apenas a primeira vez)"""
+        if self.first_request_after is not None:
+            return
+        with self._lock:
+            if self.first_request_after is None:
+                self.first_request_after = round(time.perf_counter() - self.started_at, 3)
+
+    def as_dict(self, **lazy_timings: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Retorna o relatório em formato JSON
+
+        Args:
+            lazy_timings: Tempos de componentes carregados sob demanda, por grupo
+        """
+        return {
+            "phases": dict(self.phases),
+            "ready_after": self.ready_after,
+            "first_request_after": self.first_request_after,
+            "lazy": {group: dict(timings) for group, timings in lazy_timings.items()}
+        }
+
+    def print_report(self):
+        """Exibe no console o tempo de cada etapa da inicialização"""
+        phases = ", ".join(f"{name}: {seconds:.3f}s" for name, seconds in self.phases.items())
+        print(f"Inicialização concluída em {self.ready_after:.3f}s ({phases})")
+
+
+class FirstRequestMiddleware:
+    """Middleware ASGI que registra no relatório a chegada da primeira requisição HTTP"""
+
+    def __init__(self, app, report: StartupReport):
+        self.app = app
+        self.report = report
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            self.report.mark_first_request()
+        await self.app(scope, receive, send)
+
+
+# Relatório do processo atual, criado na primeira importação do pacote da aplicação
+startup_report = StartupReport()
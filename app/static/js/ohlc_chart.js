@@ -0,0 +1,164 @@
+// Gráfico de candlestick desenhado no navegador a partir de /api/ohlc/{symbol}
+// (o servidor envia apenas arrays colunares; o layout e os traces são montados aqui).
+// Históricos longos chegam reduzidos (candles unidos); ao aproximar o gráfico, apenas
+// o intervalo visível é pedido novamente, com o detalhe correspondente.
+(function () {
+    const ZOOM_DEBOUNCE_MS = 250;
+
+    function showMessage(container, text) {
+        container.innerHTML = '';
+        const message = document.createElement('div');
+        message.className = 'alert alert-warning mb-0';
+        message.textContent = text;
+        container.appendChild(message);
+    }
+
+    function toDates(times) {
+        return times.map(function (ms) { return new Date(ms); });
+    }
+
+    function buildTraces(payload) {
+        const x = toDates(payload.time);
+        const traces = [{
+            type: 'candlestick',
+            x: x,
+            open: payload.open,
+            high: payload.high,
+            low: payload.low,
+            close: payload.close,
+            name: payload.symbol
+        }];
+        payload.overlays.forEach(function (overlay) {
+            traces.push({
+                type: 'scatter',
+                mode: 'lines',
+                // Linhas reduzidas (LTTB) trazem seus próprios horários
+                x: overlay.time ? toDates(overlay.time) : x,
+                y: overlay.values,
+                name: overlay.name,
+                line: overlay.line,
+                hoverinfo: overlay.key.indexOf('bb_') === 0 ? 'skip' : undefined
+            });
+        });
+        return traces;
+    }
+
+    function buildLayout(payload, range) {
+        const axis = { gridcolor: '#EBF0F8', zerolinecolor: '#EBF0F8', linecolor: '#EBF0F8' };
+        let title = payload.symbol + ' - ' + payload.timeframe;
+        if (payload.bars_per_point > 1) {
+            title += ' (' + payload.bars_per_point + ' barras por candle)';
+        }
+        const xaxis = Object.assign({ title: { text: 'Data/Hora' }, type: 'date', rangeslider: { visible: false } }, axis);
+        if (range) {
+            xaxis.range = range;
+            xaxis.autorange = false;
+        }
+        return {
+            title: { text: title },
+            xaxis: xaxis,
+            yaxis: Object.assign({ title: { text: 'Preço' }, autorange: true }, axis),
+            paper_bgcolor: 'white',
+            plot_bgcolor: 'white',
+            autosize: true
+        };
+    }
+
+    // Datas do eixo do Plotly ("2024-01-02 10:00:00.000") em ms desde a época. Os traces usam
+    // objetos Date, exibidos no fuso do navegador, então o intervalo volta em horário local
+    function toMillis(value) {
+        if (typeof value === 'number') {
+            return value;
+        }
+        const parts = String(value).match(/^(-?\d+)-(\d+)-(\d+)(?:[ T](\d+):(\d+)(?::(\d+)(?:\.(\d+))?)?)?/);
+        if (!parts) {
+            return Date.parse(value);
+        }
+        const fraction = parts[7] ? Number('0.' + parts[7]) * 1000 : 0;
+        return new Date(
+            Number(parts[1]), Number(parts[2]) - 1, Number(parts[3]),
+            Number(parts[4] || 0), Number(parts[5] || 0), Number(parts[6] || 0), fraction
+        ).getTime();
+    }
+
+    function render(container) {
+        const source = container.dataset.ohlcSrc;
+        let overview = null;   // Payload do histórico completo, reaproveitado ao desfazer o zoom
+        let current = null;
+        let request = 0;
+        let timer = null;
+
+        function load(range) {
+            const url = new URL(source, window.location.origin);
+            if (range) {
+                url.searchParams.set('start', Math.floor(toMillis(range[0])));
+                url.searchParams.set('end', Math.ceil(toMillis(range[1])));
+            }
+            const id = ++request;
+            return fetch(url, { headers: { 'Accept': 'application/json' } })
+                .then(function (response) { return response.json(); })
+                .then(function (payload) {
+                    // Descarta respostas de zooms anteriores
+                    return id === request ? payload : null;
+                });
+        }
+
+        function draw(payload, range) {
+            current = payload;
+            return Plotly.react(container, buildTraces(payload), buildLayout(payload, range), { responsive: true });
+        }
+
+        function onRelayout(event) {
+            if (event['xaxis.autorange']) {
+                clearTimeout(timer);
+                request++;
+                if (overview && current !== overview) {
+                    draw(overview, null);
+                }
+                return;
+            }
+            const start = event['xaxis.range[0]'] || (event['xaxis.range'] || [])[0];
+            const end = event['xaxis.range[1]'] || (event['xaxis.range'] || [])[1];
+            if (start === undefined || end === undefined || !current) {
+                return;
+            }
+            // Busca novamente se os dados exibidos estão reduzidos ou se o novo
+            // intervalo sai do trecho carregado no zoom anterior
+            const times = current.time;
+            const covered = current === overview || (times.length
+                && toMillis(start) >= times[0] && toMillis(end) <= times[times.length - 1]);
+            if (current.bars_per_point <= 1 && covered) {
+                return;
+            }
+            clearTimeout(timer);
+            timer = setTimeout(function () {
+                const range = [start, end];
+                load(range).then(function (payload) {
+                    if (payload && !payload.error) {
+                        draw(payload, range);
+                    }
+                });
+            }, ZOOM_DEBOUNCE_MS);
+        }
+
+        load(null)
+            .then(function (payload) {
+                if (!payload) {
+                    return;
+                }
+                if (payload.error) {
+                    showMessage(container, 'Erro: ' + payload.error);
+                    return;
+                }
+                overview = payload;
+                return draw(payload, null).then(function () {
+                    container.on('plotly_relayout', onRelayout);
+                });
+            })
+            .catch(function (error) {
+                showMessage(container, 'Erro ao carregar o gráfico: ' + error);
+            });
+    }
+
+    document.querySelectorAll('[data-ohlc-src]').forEach(render);
+})();
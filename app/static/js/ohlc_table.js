@@ -0,0 +1,146 @@
+// Tabela OHLC com rolagem virtual: apenas as linhas visíveis são pedidas a
+// /api/table/{symbol} (em páginas) e desenhadas; a ordenação é feita no servidor.
+(function () {
+    const PAGE_SIZE = 100;
+    const ROW_HEIGHT = 33;
+    const OVERSCAN = 10;
+
+    function render(container) {
+        const source = container.dataset.tableSrc;
+        const pages = new Map();      // número da página -> linhas
+        const pending = new Set();
+        let columns = null;
+        let total = 0;
+        let sort = 'time';
+        let order = 'asc';
+        let generation = 0;
+
+        const table = document.createElement('table');
+        table.className = 'table table-striped table-hover table-bordered mb-0';
+        const thead = table.createTHead();
+        const tbody = table.createTBody();
+        container.appendChild(table);
+
+        function showMessage(text) {
+            container.innerHTML = '';
+            const message = document.createElement('div');
+            message.className = 'error';
+            message.textContent = text;
+            container.appendChild(message);
+        }
+
+        function fetchPage(page) {
+            if (pages.has(page) || pending.has(page)) {
+                return;
+            }
+            pending.add(page);
+            const id = generation;
+            const url = new URL(source, window.location.origin);
+            url.searchParams.set('offset', page * PAGE_SIZE);
+            url.searchParams.set('limit', PAGE_SIZE);
+            url.searchParams.set('sort', sort);
+            url.searchParams.set('order', order);
+            fetch(url, { headers: { 'Accept': 'application/json' } })
+                .then(function (response) { return response.json(); })
+                .then(function (payload) {
+                    // Respostas de uma ordenação anterior são descartadas
+                    if (id !== generation) {
+                        return;
+                    }
+                    pending.delete(page);
+                    if (payload.error) {
+                        showMessage('Erro: ' + payload.error);
+                        return;
+                    }
+                    total = payload.total;
+                    if (!columns) {
+                        columns = payload.columns;
+                        renderHeader();
+                    }
+                    pages.set(page, payload.rows);
+                    renderRows();
+                })
+                .catch(function (error) {
+                    pending.delete(page);
+                    showMessage('Erro ao carregar a tabela: ' + error);
+                });
+        }
+
+        function renderHeader() {
+            thead.innerHTML = '';
+            const row = thead.insertRow();
+            columns.forEach(function (column) {
+                const th = document.createElement('th');
+                let label = column.label;
+                if (column.key === sort) {
+                    label += order === 'asc' ? ' ▲' : ' ▼';
+                }
+                th.textContent = label;
+                th.addEventListener('click', function () {
+                    order = column.key === sort && order === 'asc' ? 'desc' : 'asc';
+                    sort = column.key;
+                    generation++;
+                    pages.clear();
+                    pending.clear();
+                    container.scrollTop = 0;
+                    renderHeader();
+                    fetchPage(0);
+                });
+                row.appendChild(th);
+            });
+        }
+
+        function spacer(height) {
+            const row = document.createElement('tr');
+            const cell = row.insertCell();
+            cell.colSpan = columns.length;
+            cell.style.height = height + 'px';
+            cell.style.padding = '0';
+            cell.style.border = '0';
+            return row;
+        }
+
+        function renderRows() {
+            if (!columns) {
+                return;
+            }
+            const first = Math.max(0, Math.floor(container.scrollTop / ROW_HEIGHT) - OVERSCAN);
+            const visible = Math.ceil(container.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN;
+            const last = Math.min(total, first + visible);
+
+            const fragment = document.createDocumentFragment();
+            fragment.appendChild(spacer(first * ROW_HEIGHT));
+            for (let index = first; index < last; index++) {
+                const rows = pages.get(Math.floor(index / PAGE_SIZE));
+                if (!rows) {
+                    fetchPage(Math.floor(index / PAGE_SIZE));
+                }
+                const values = rows ? rows[index % PAGE_SIZE] : null;
+                const row = document.createElement('tr');
+                row.style.height = ROW_HEIGHT + 'px';
+                columns.forEach(function (_, position) {
+                    const cell = row.insertCell();
+                    cell.textContent = values ? (values[position] === null ? '—' : values[position]) : '…';
+                });
+                fragment.appendChild(row);
+            }
+            fragment.appendChild(spacer((total - last) * ROW_HEIGHT));
+            tbody.replaceChildren(fragment);
+        }
+
+        let scheduled = false;
+        container.addEventListener('scroll', function () {
+            if (!scheduled) {
+                scheduled = true;
+                window.requestAnimationFrame(function () {
+                    scheduled = false;
+                    renderRows();
+                });
+            }
+        });
+
+        fetchPage(0);
+    }
+
+    document.querySelectorAll('[data-table-src]').forEach(render);
+})();
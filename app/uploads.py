@@ -0,0 +1,294 @@
+import codecs
+import csv
+import os
+from typing import IO, Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Bytes lidos do início do arquivo para detectar codificação e separador
+UPLOAD_SAMPLE_SIZE = int(os.getenv("UPLOAD_SAMPLE_SIZE", str(64 * 1024)))
+
+# Separadores aceitos, em ordem de preferência em caso de empate
+CSV_SEPARATORS = {
+    ',': "Vírgula (,)",
+    ';': "Ponto e vírgula (;)",
+    '\t': "Tab",
+    '|': "Pipe (|)"
+}
+
+# Linhas da amostra usadas para confirmar o separador
+SNIFF_LINES = 50
+
+# Colunas obrigatórias dos resultados de trading enviados
+RESULT_DATE_COLUMN = 'data'
+RESULT_NUMERIC_COLUMNS = [
+    'min_pts_gain', 'max_pts_gain', 'min_pts_stop', 'max_pts_stop', 'min_resultado', 'max_resultado'
+]
+RESULT_COLUMNS = [RESULT_DATE_COLUMN] + RESULT_NUMERIC_COLUMNS
+
+# Períodos do consolidado de lucro e perda: (nome, meses por período, rótulo)
+AGGREGATE_PERIODS = (
+    ('mensal', 1, "{year}-{index:02d}"),
+    ('trimestral', 3, "{year}-T{index}"),
+    ('semestral', 6, "{year}-S{index}"),
+    ('anual', 12, "{year}")
+)
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    Detecta a codificação a partir do início do arquivo
+
+    Args:
+        sample (bytes): Primeiros bytes do arquivo
+
+    Returns:
+        str: 'utf-8-sig' ou 'utf-16' (com BOM), 'utf-8', 'cp1252' ou 'latin-1'
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+
+    # Decodificação incremental: um caractere cortado no fim da amostra não é erro
+    for encoding in ('utf-8', 'cp1252'):
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1'
+
+
+def detect_separator(lines: Sequence[str]) -> Optional[str]:
+    """
+    Detecta o separador pelas primeiras linhas do arquivo
+
+    Escolhe o separador que divide o cabeçalho no maior número de colunas,
+    desde que a maioria das linhas seguintes tenha o mesmo número de campos.
+
+    Args:
+        lines (Sequence[str]): Primeiras linhas completas (cabeçalho primeiro)
+
+    Returns:
+        str: Separador, ou None se nenhum gerar pelo menos 2 colunas
+    """
+    best, best_width = None, 1
+    for sep in CSV_SEPARATORS:
+        widths = [len(row) for row in csv.reader(lines, delimiter=sep, skipinitialspace=True) if row]
+        if not widths:
+            continue
+        width = widths[0]
+        consistent = sum(1 for w in widths[1:] if w == width)
+        if width > best_width and consistent * 2 >= len(widths) - 1:
+            best, best_width = sep, width
+    return best
+
+
+def sniff_csv(stream: IO[bytes]) -> Dict[str, Any]:
+    """
+    Detecta codificação, separador e colunas lendo apenas uma amostra do início do arquivo
+
+    Args:
+        stream (IO[bytes]): Arquivo binário posicionado no início (volta ao início ao final)
+
+    Returns:
+        Dict: encoding, separator e columns (nomes do cabeçalho)
+
+    Raises:
+        ValueError: Se o arquivo estiver vazio ou nenhum separador for reconhecido
+    """
+    sample = stream.read(UPLOAD_SAMPLE_SIZE)
+    stream.seek(0)
+    if not sample.strip():
+        raise ValueError("O arquivo está vazio ou não contém dados válidos.")
+
+    encoding = detect_encoding(sample)
+    text = sample.decode(encoding, errors='ignore')
+
+    # Descarta a última linha da amostra se ela tiver sido cortada
+    lines = text.splitlines()
+    if len(sample) == UPLOAD_SAMPLE_SIZE and len(lines) > 1:
+        lines = lines[:-1]
+    lines = lines[:SNIFF_LINES]
+
+    sep = detect_separator(lines)
+    if sep is None:
+        raise ValueError(
+            "Não foi possível processar o arquivo CSV. Verifique se o arquivo está formatado corretamente "
+            "com separadores válidos (vírgula, ponto e vírgula, tab ou pipe)."
+        )
+
+    header = next(csv.reader(lines, delimiter=sep, skipinitialspace=True))
+    return {"encoding": encoding, "separator": sep, "columns": header}
+
+
+def read_csv_stream(stream: IO[bytes], encoding: str, sep: str,
+                    usecols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Lê o CSV uma única vez, direto do arquivo
+
+    Uma única chamada ao leitor do pandas: cada coluna é montada uma vez, sem
+    manter blocos lidos e a cópia concatenada em memória ao mesmo tempo.
+
+    Args:
+        stream (IO[bytes]): Arquivo binário posicionado no início
+        encoding (str): Codificação detectada por sniff_csv
+        sep (str): Separador detectado por sniff_csv
+        usecols (Sequence[str], opcional): Colunas a manter (as demais não são convertidas)
+
+    Returns:
+        pd.DataFrame: Linhas válidas do arquivo (linhas malformadas são ignoradas)
+    """
+    return pd.read_csv(
+        stream,
+        sep=sep,
+        encoding=encoding,
+        encoding_errors='replace',  # bytes inválidos após a amostra não interrompem a leitura
+        usecols=usecols,
+        on_bad_lines='skip',
+        skipinitialspace=True
+    )
+
+
+def read_upload(stream: IO[bytes], filename: str,
+                required_columns: Sequence[str]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Lê um arquivo enviado (CSV ou Excel), mantendo apenas as colunas obrigatórias
+
+    O arquivo é lido direto do disco (o upload já é gravado em arquivo
+    temporário pelo servidor). No CSV, codificação, separador e colunas são
+    validados pela amostra inicial antes da leitura completa, feita uma vez.
+
+    Args:
+        stream (IO[bytes]): Arquivo enviado
+        filename (str): Nome original do arquivo (define o formato)
+        required_columns (Sequence[str]): Colunas que o arquivo deve conter
+
+    Returns:
+        Tuple[pd.DataFrame, Dict]: Dados e informações da leitura (separator, encoding)
+
+    Raises:
+        ValueError: Formato não reconhecido ou colunas obrigatórias ausentes
+    """
+    stream.seek(0)
+    if filename.lower().endswith('.csv'):
+        dialect = sniff_csv(stream)
+        missing_columns = [col for col in required_columns if col not in dialect["columns"]]
+        if missing_columns:
+            raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(missing_columns)}")
+
+        df = read_csv_stream(stream, dialect["encoding"], dialect["separator"], usecols=required_columns)
+        info = {"separator": CSV_SEPARATORS[dialect["separator"]], "encoding": dialect["encoding"]}
+    else:
+        df = pd.read_excel(stream)
+        missing_columns = [col for col in required_columns if col not in df.columns]
+        if missing_columns:
+            raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(missing_columns)}")
+        info = {"separator": None, "encoding": None}
+
+    return df[list(required_columns)], info
+
+
+def normalize_results(data: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Converte os resultados enviados em colunas tipadas e ordenadas por data, uma única vez
+
+    A data vira datetime64 e as demais colunas float64; linhas com data
+    inválida são descartadas e valores numéricos inválidos viram 0.
+
+    Args:
+        data (pd.DataFrame): Dados lidos por read_upload (colunas RESULT_COLUMNS)
+
+    Returns:
+        Tuple[pd.DataFrame, Dict]: Dados normalizados e o relatório de conversão
+            (invalid_dates e invalid_values por coluna)
+
+    Raises:
+        ValueError: Se nenhuma linha tiver data válida
+    """
+    dates = pd.to_datetime(data[RESULT_DATE_COLUMN], errors='coerce')
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        dates = dates.dt.tz_convert(None)
+    valid = dates.notna().to_numpy()
+    if len(data) > 0 and not valid.any():
+        raise ValueError(f"Nenhuma data válida na coluna '{RESULT_DATE_COLUMN}'")
+
+    # Ordenação estável: dias repetidos mantêm a ordem do arquivo
+    dates = dates.to_numpy(dtype='datetime64[ns]')[valid]
+    order = np.argsort(dates, kind='stable')
+    columns = {RESULT_DATE_COLUMN: dates[order]}
+
+    invalid_values = {}
+    for col in RESULT_NUMERIC_COLUMNS:
+        raw = data[col].to_numpy()[valid]
+        values = pd.to_numeric(raw, errors='coerce').astype(np.float64)
+        # Vazios já eram tratados como 0; só texto não numérico conta como erro
+        missing = pd.isna(raw) | (raw == '') if raw.dtype == object else pd.isna(raw)
+        invalid = int((np.isnan(values) & ~missing).sum())
+        if invalid:
+            invalid_values[col] = invalid
+        columns[col] = np.nan_to_num(values, nan=0.0)[order]
+
+    report = {"invalid_dates": int((~valid).sum()), "invalid_values": invalid_values}
+    return pd.DataFrame(columns), report
+
+
+def describe_parse_errors(report: Dict[str, Any]) -> Optional[str]:
+    """Resume o relatório de normalize_results para exibição, ou None se não houver erros"""
+    parts = []
+    if report["invalid_dates"]:
+        parts.append(f"{report['invalid_dates']} linha(s) com data inválida descartada(s)")
+    for col, count in report["invalid_values"].items():
+        parts.append(f"{count} valor(es) inválido(s) em '{col}' tratado(s) como 0")
+    return "; ".join(parts) or None
+
+
+def _group_starts(keys: np.ndarray) -> np.ndarray:
+    """Posições onde começa cada sequência de chaves iguais (chaves ordenadas)"""
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=np.int64)
+
+
+def period_aggregates(data: pd.DataFrame) -> Dict[str, Dict[str, list]]:
+    """
+    Consolida lucro e perda por mês, trimestre, semestre e ano
+
+    As somas mensais são calculadas com reduções agrupadas sobre as linhas
+    (já ordenadas por data) e os períodos maiores são agregados a partir dos
+    meses, sem voltar às linhas.
+
+    Args:
+        data (pd.DataFrame): Resultados normalizados por normalize_results
+
+    Returns:
+        Dict[str, Dict]: Por período ('mensal', 'trimestral', 'semestral', 'anual'),
+            periodos (rótulos), lucros (soma dos resultados positivos) e
+            perdas (valor absoluto da soma dos negativos)
+    """
+    resultado = data['max_resultado'].to_numpy(dtype=np.float64)
+    # Meses desde 1970-01
+    months = data[RESULT_DATE_COLUMN].to_numpy().astype('datetime64[M]').astype(np.int64)
+
+    starts = _group_starts(months)
+    codes = months[starts]
+    if len(starts):
+        lucros = np.add.reduceat(np.where(resultado > 0, resultado, 0.0), starts)
+        perdas = np.add.reduceat(np.where(resultado < 0, -resultado, 0.0), starts)
+    else:
+        lucros = perdas = np.array([], dtype=np.float64)
+
+    aggregates = {}
+    for name, size, label in AGGREGATE_PERIODS:
+        groups = codes // size
+        group_starts = _group_starts(groups)
+        period_lucros = np.add.reduceat(lucros, group_starts) if len(group_starts) else lucros
+        period_perdas = np.add.reduceat(perdas, group_starts) if len(group_starts) else perdas
+        per_year = 12 // size
+        aggregates[name] = {
+            'periodos': [label.format(year=1970 + int(g) // per_year, index=int(g) % per_year + 1)
+                         for g in groups[group_starts]],
+            'lucros': period_lucros.tolist(),
+            'perdas': period_perdas.tolist()
+        }
+    return aggregates
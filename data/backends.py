@@ -0,0 +1,326 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class MarketDataBackend(ABC):
+    """Interface das fontes de dados de mercado usadas pelo ForexDataProvider"""
+
+    # Nome da fonte (também usado para separar as séries no armazenamento local)
+    name = 'base'
+
+    def resolve_symbol(self, symbol: str) -> str:
+        """
+        Converte um par de moedas ou ativo B3 para o símbolo usado pela fonte
+
+        Args:
+            symbol (str): Par de moedas (ex: 'EURUSD') ou ativo B3 (ex: 'WINFUT')
+
+        Returns:
+            str: Símbolo na fonte de dados
+        """
+        return symbol
+
+    @abstractmethod
+    def download(self, symbols: List[str], start_date, end_date, interval: str) -> Dict[str, pd.DataFrame]:
+        """
+        Obtém barras OHLC de vários símbolos
+
+        Args:
+            symbols (List[str]): Símbolos na fonte de dados
+            start_date (datetime): Data inicial
+            end_date (datetime): Data final (exclusiva)
+            interval (str): Intervalo das barras ('1h', '1d')
+
+        Returns:
+            Dict[str, pandas.DataFrame]: Dados OHLC por símbolo, com colunas
+                open/high/low/close/volume (vazio se não houver dados)
+        """
+
+    @abstractmethod
+    def get_last_price(self, symbol: str) -> Optional[float]:
+        """
+        Obtém o último preço negociado
+
+        Args:
+            symbol (str): Símbolo na fonte de dados
+
+        Returns:
+            float: Último preço ou None se não houver dados
+        """
+
+    def get_last_prices(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        """
+        Obtém o último preço de vários símbolos
+
+        Fontes que suportam consultas em lote devem sobrescrever este método
+        para usar uma única chamada.
+
+        Args:
+            symbols (List[str]): Símbolos na fonte de dados
+
+        Returns:
+            Dict[str, float]: Último preço por símbolo (None se não houver dados)
+        """
+        return {symbol: self.get_last_price(symbol) for symbol in symbols}
+
+
+class YFinanceBackend(MarketDataBackend):
+    """Fonte de dados do Yahoo Finance (yfinance)"""
+
+    name = 'yfinance'
+
+    # Símbolos do Yahoo Finance usados como proxy para os ativos B3
+    B3_PROXIES = {
+        'WINFUT': '^BVSP',  # Índice Bovespa como proxy para mini índice
+        'WDOFUT': 'USDBRL=X'  # Par USD/BRL como proxy para mini dólar
+    }
+
+    def resolve_symbol(self, symbol: str) -> str:
+        """Converte o símbolo para o formato do Yahoo Finance"""
+        if symbol in self.B3_PROXIES:
+            return self.B3_PROXIES[symbol]
+
+        # Adiciona o sufixo =X se não estiver presente (para Forex)
+        if not symbol.endswith('=X'):
+            symbol = f"{symbol}=X"
+        return symbol
+
+    @staticmethod
+    def _normalize_columns(data: pd.DataFrame) -> pd.DataFrame:
+        """Normaliza os nomes das colunas OHLC retornadas pelo yfinance"""
+        # Achata as colunas multi-level se necessário
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = [col[0].lower() if col[0] else col[1].lower() for col in data.columns]
+        else:
+            # Renomeia as colunas para o formato padrão
+            data = data.rename(columns={
+                'Open': 'open',
+                'High': 'high',
+                'Low': 'low',
+                'Close': 'close',
+                'Volume': 'volume'
+            })
+
+        return data
+
+    def download(self, symbols: List[str], start_date, end_date, interval: str) -> Dict[str, pd.DataFrame]:
+        """Baixa barras de vários símbolos em uma única chamada ao yfinance"""
+        import yfinance as yf
+
+        data = yf.download(
+            symbols,
+            start=start_date,
+            end=end_date,
+            interval=interval,
+            progress=False,
+            auto_adjust=True,
+            group_by='ticker'
+        )
+
+        result = {}
+        tickers = set(data.columns.get_level_values(0)) if isinstance(data.columns, pd.MultiIndex) else set()
+        for symbol in symbols:
+            # Se não houver dados para o símbolo, retorna DataFrame vazio
+            if data.empty or symbol not in tickers:
+                result[symbol] = pd.DataFrame()
+                continue
+
+            # Remove as linhas criadas pelo alinhamento com os outros símbolos
+            symbol_data = data[symbol].dropna(how='all')
+            result[symbol] = self._normalize_columns(symbol_data) if not symbol_data.empty else pd.DataFrame()
+
+        return result
+
+    def get_last_price(self, symbol: str) -> Optional[float]:
+        """Obtém o último fechamento do dia corrente"""
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+        data = ticker.history(period='1d')
+
+        if data.empty:
+            return None
+
+        return data['Close'].iloc[-1]
+
+    def get_last_prices(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        """Obtém os últimos fechamentos de todos os símbolos em uma única chamada ao yfinance"""
+        import yfinance as yf
+
+        data = yf.download(
+            symbols,
+            period='5d',
+            interval='1d',
+            progress=False,
+            auto_adjust=True,
+            group_by='ticker'
+        )
+
+        prices = {}
+        tickers = set(data.columns.get_level_values(0)) if isinstance(data.columns, pd.MultiIndex) else set()
+        for symbol in symbols:
+            closes = data[symbol]['Close'].dropna() if symbol in tickers else pd.Series(dtype=float)
+            prices[symbol] = float(closes.iloc[-1]) if not closes.empty else None
+
+        return prices
+
+
+class ReplayBackend(MarketDataBackend):
+    """
+    Fonte de dados offline que reproduz barras gravadas em arquivos locais
+
+    Cada série fica em '<diretório>/<SÍMBOLO>_<intervalo>.csv' (ou '.parquet'),
+    por exemplo 'EURUSD_1h.csv', com o horário na primeira coluna e as colunas
+    open/high/low/close/volume. Útil para testes de desempenho e benchmarks
+    determinísticos, sem acesso à rede.
+    """
+
+    name = 'replay'
+
+    def __init__(self, data_dir: str):
+        """
+        Inicializa a fonte de reprodução
+
+        Args:
+            data_dir (str): Diretório com os arquivos gravados
+        """
+        self.data_dir = data_dir
+        self._series = {}  # (símbolo, intervalo) -> DataFrame carregado
+
+    def resolve_symbol(self, symbol: str) -> str:
+        """Os arquivos são nomeados pelo símbolo sem o sufixo do Yahoo Finance"""
+        return symbol.replace('=X', '')
+
+    def _path(self, symbol: str, interval: str, extension: str) -> str:
+        """Caminho do arquivo de uma série"""
+        return os.path.join(self.data_dir, f"{symbol}_{interval}.{extension}")
+
+    def _load(self, symbol: str, interval: str) -> pd.DataFrame:
+        """Carrega (uma única vez) a série gravada de um símbolo"""
+        key = (symbol, interval)
+        if key not in self._series:
+            parquet_path = self._path(symbol, interval, 'parquet')
+            csv_path = self._path(symbol, interval, 'csv')
+            if os.path.exists(parquet_path):
+                data = pd.read_parquet(parquet_path)
+            elif os.path.exists(csv_path):
+                data = pd.read_csv(csv_path, index_col=0)
+                data.index = pd.to_datetime(data.index)
+            else:
+                data = pd.DataFrame()
+
+            if not data.empty:
+                data.columns = [str(col).lower() for col in data.columns]
+                data = data.sort_index()
+            self._series[key] = data
+        return self._series[key]
+
+    @staticmethod
+    def _align(timestamp, index):
+        """Ajusta o fuso de uma data ao do índice (como get_ohlc_data faz)"""
+        timestamp = pd.Timestamp(timestamp)
+        if index.tz is not None and timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize(index.tz)
+        elif index.tz is None and timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_localize(None)
+        return timestamp
+
+    def download(self, symbols: List[str], start_date, end_date, interval: str) -> Dict[str, pd.DataFrame]:
+        """Retorna as barras gravadas dentro do período solicitado"""
+        result = {}
+        for symbol in symbols:
+            data = self._load(symbol, interval)
+            if data.empty:
+                result[symbol] = pd.DataFrame()
+                continue
+
+            mask = np.ones(len(data), dtype=bool)
+            if start_date is not None:
+                mask &= data.index >= self._align(start_date, data.index)
+            if end_date is not None:
+                mask &= data.index < self._align(end_date, data.index)
+            result[symbol] = data[mask]
+
+        return result
+
+    def get_last_price(self, symbol: str) -> Optional[float]:
+        """Retorna o último fechamento gravado, preferindo a série mais fina"""
+        for interval in ['1h', '1d']:
+            data = self._load(symbol, interval)
+            if not data.empty:
+                return float(data['close'].iloc[-1])
+        return None
+
+    def save(self, symbol: str, interval: str, data: pd.DataFrame):
+        """
+        Grava uma série para reprodução posterior
+
+        Args:
+            symbol (str): Símbolo (ex: 'EURUSD')
+            interval (str): Intervalo das barras ('1h', '1d')
+            data (pandas.DataFrame): Barras OHLC a gravar
+        """
+        os.makedirs(self.data_dir, exist_ok=True)
+        data.to_csv(self._path(symbol, interval, 'csv'))
+        self._series.pop((symbol, interval), None)
+
+
+def generate_synthetic_bars(start_date, end_date, interval: str = '1h', start_price: float = 1.0,
+                            volatility: float = 0.001, seed: Optional[int] = None) -> pd.DataFrame:
+    """
+    Gera barras OHLC sintéticas (passeio aleatório) para testes e benchmarks
+
+    Args:
+        start_date (datetime): Data inicial
+        end_date (datetime): Data final
+        interval (str): Intervalo das barras ('1h', '1d')
+        start_price (float): Preço inicial
+        volatility (float): Desvio padrão do retorno por barra
+        seed (int, opcional): Semente para resultados reproduzíveis
+
+    Returns:
+        pandas.DataFrame: Barras OHLC em dias úteis, no formato do yfinance
+    """
+    rng = np.random.default_rng(seed)
+    freq = 'h' if interval == '1h' else 'D'
+    index = pd.date_range(pd.Timestamp(start_date).floor(freq), end_date, freq=freq,
+                          tz='UTC' if interval == '1h' else None)
+    index = index[index.weekday < 5]
+    index.name = 'Datetime' if interval == '1h' else 'Date'
+
+    returns = rng.normal(0.0, volatility, size=len(index))
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    spread = np.abs(rng.normal(0.0, volatility / 2, size=len(index))) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+
+    return pd.DataFrame({
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': np.zeros(len(index))
+    }, index=index)
+
+
+def create_backend(name: Optional[str] = None) -> MarketDataBackend:
+    """
+    Cria a fonte de dados configurada
+
+    Args:
+        name (str, opcional): 'yfinance' ou 'replay'. Se não informado, usa MARKET_DATA_BACKEND
+
+    Returns:
+        MarketDataBackend: Fonte de dados
+    """
+    name = name or os.getenv("MARKET_DATA_BACKEND", "yfinance")
+    if name == 'yfinance':
+        return YFinanceBackend()
+    if name == 'replay':
+        return ReplayBackend(os.getenv("REPLAY_DATA_DIR", os.path.join("data", "replay")))
+    raise ValueError(f"Fonte de dados {name} não suportada")
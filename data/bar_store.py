@@ -0,0 +1,170 @@
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+
+class BarStore:
+    """Armazenamento local de barras OHLC em arquivos NumPy mapeados em memória"""
+
+    COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self, root_dir: str):
+        """
+        Inicializa o armazenamento de barras
+
+        Args:
+            root_dir (str): Diretório raiz onde as séries são gravadas
+        """
+        self.root_dir = root_dir
+
+    def _series_dir(self, symbol: str, interval: str) -> str:
+        """Retorna o diretório de uma série (símbolo, intervalo)"""
+        safe_symbol = re.sub(r'[^A-Za-z0-9]+', '_', symbol).strip('_')
+        return os.path.join(self.root_dir, f"{safe_symbol}_{interval}")
+
+    def _read_meta(self, series_dir: str):
+        """Lê os metadados da série ou retorna None se não existir"""
+        meta_path = os.path.join(series_dir, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _to_ns(timestamp, tz) -> int:
+        """Converte uma data para nanossegundos no mesmo referencial do índice armazenado"""
+        ts = pd.Timestamp(timestamp)
+        if tz is not None and ts.tzinfo is None:
+            ts = ts.tz_localize(tz)
+        elif tz is None and ts.tzinfo is not None:
+            ts = ts.tz_localize(None)
+        return ts.value
+
+    def bounds(self, symbol: str, interval: str):
+        """
+        Obtém os limites da série armazenada
+
+        Args:
+            symbol (str): Símbolo na fonte de dados (ex: 'EURUSD=X')
+            interval (str): Intervalo das barras ('1h', '1d')
+
+        Returns:
+            tuple: (primeira barra, última barra, início coberto) ou (None, None, None)
+        """
+        series_dir = self._series_dir(symbol, interval)
+        meta = self._read_meta(series_dir)
+        if meta is None or meta['rows'] == 0:
+            return None, None, None
+
+        index = np.load(os.path.join(series_dir, 'index.npy'), mmap_mode='r')
+        first = self._from_ns(int(index[0]), meta['tz'])
+        last = self._from_ns(int(index[-1]), meta['tz'])
+        covered_from = pd.Timestamp(meta['covered_from']).to_pydatetime()
+        return first, last, covered_from
+
+    @staticmethod
+    def _from_ns(value: int, tz):
+        """Converte nanossegundos armazenados de volta para pd.Timestamp"""
+        ts = pd.Timestamp(value)
+        if tz is not None:
+            ts = ts.tz_localize('UTC').tz_convert(tz)
+        return ts
+
+    def read(self, symbol: str, interval: str, start=None) -> pd.DataFrame:
+        """
+        Lê as barras armazenadas a partir de uma data
+
+        Apenas a janela solicitada é copiada do arquivo mapeado em memória.
+
+        Args:
+            symbol (str): Símbolo na fonte de dados (ex: 'EURUSD=X')
+            interval (str): Intervalo das barras ('1h', '1d')
+            start (datetime, opcional): Data inicial da janela
+
+        Returns:
+            pandas.DataFrame: Dados OHLC armazenados
+        """
+        series_dir = self._series_dir(symbol, interval)
+        meta = self._read_meta(series_dir)
+        if meta is None or meta['rows'] == 0:
+            return pd.DataFrame()
+
+        index = np.load(os.path.join(series_dir, 'index.npy'), mmap_mode='r')
+        values = np.load(os.path.join(series_dir, 'values.npy'), mmap_mode='r')
+
+        first_row = 0
+        if start is not None:
+            first_row = int(np.searchsorted(index, self._to_ns(start, meta['tz']), side='left'))
+
+        dt_index = pd.DatetimeIndex(np.array(index[first_row:], dtype='datetime64[ns]'), name=meta['index_name'])
+        if meta['tz'] is not None:
+            dt_index = dt_index.tz_localize('UTC').tz_convert(meta['tz'])
+
+        return pd.DataFrame(np.array(values[first_row:]), index=dt_index, columns=meta['columns'])
+
+    def merge(self, symbol: str, interval: str, data: pd.DataFrame, covered_from=None):
+        """
+        Incorpora novas barras à série, substituindo barras com o mesmo horário
+
+        Args:
+            symbol (str): Símbolo na fonte de dados (ex: 'EURUSD=X')
+            interval (str): Intervalo das barras ('1h', '1d')
+            data (pandas.DataFrame): Barras baixadas da fonte
+            covered_from (datetime, opcional): Início do período consultado na fonte
+                para obter data. Ignorado se data estiver vazio
+        """
+        # Sem barras (falha ou resposta vazia da fonte), a série e o período
+        # coberto não mudam: o trecho continua pendente e é pedido de novo
+        if data.empty:
+            return
+
+        series_dir = self._series_dir(symbol, interval)
+        meta = self._read_meta(series_dir)
+
+        if meta is not None and meta['rows'] > 0:
+            columns = meta['columns']
+            existing = self.read(symbol, interval)
+            incoming = data.reindex(columns=columns)
+            if existing.index.tz is not None and incoming.index.tz is not None:
+                incoming.index = incoming.index.tz_convert(existing.index.tz)
+            data = pd.concat([existing, incoming])
+            data = data[~data.index.duplicated(keep='last')].sort_index()
+        else:
+            columns = [col for col in self.COLUMNS if col in data.columns]
+            data = data.reindex(columns=columns).sort_index()
+
+        tz = str(data.index.tz) if data.index.tz is not None else None
+        previous_cover = meta['covered_from'] if meta is not None else None
+        if covered_from is None or (previous_cover is not None and pd.Timestamp(previous_cover) < pd.Timestamp(covered_from)):
+            covered_from = previous_cover
+
+        os.makedirs(series_dir, exist_ok=True)
+        # Grava em arquivos temporários e substitui atomicamente
+        self._save_array(series_dir, 'index.npy', data.index.as_unit('ns').asi8.astype(np.int64))
+        self._save_array(series_dir, 'values.npy', data.to_numpy(dtype=np.float64))
+        self._save_meta(series_dir, {
+            'rows': len(data),
+            'tz': tz,
+            'index_name': data.index.name,
+            'columns': list(data.columns),
+            'covered_from': pd.Timestamp(covered_from).isoformat() if covered_from is not None else None
+        })
+
+    @staticmethod
+    def _save_array(series_dir: str, filename: str, array: np.ndarray):
+        """Grava um array NumPy de forma atômica"""
+        tmp_path = os.path.join(series_dir, f".{filename}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, os.path.join(series_dir, filename))
+
+    @staticmethod
+    def _save_meta(series_dir: str, meta):
+        """Grava os metadados da série de forma atômica"""
+        tmp_path = os.path.join(series_dir, '.meta.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(series_dir, 'meta.json'))
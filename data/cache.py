@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """Cache LRU com expiração por entrada e coalescência de buscas concorrentes"""
+
+    def __init__(self, maxsize: int = 256, maxweight: Optional[int] = None,
+                 weigher: Optional[Callable[[Any], int]] = None):
+        """
+        Inicializa o cache
+
+        Args:
+            maxsize (int): Número máximo de entradas antes de descartar a menos usada
+            maxweight (int, opcional): Peso total máximo (ex: bytes em memória) das entradas
+            weigher (Callable, opcional): Função que calcula o peso de um valor (obrigatória com maxweight)
+        """
+        self.maxsize = maxsize
+        self.maxweight = maxweight
+        self.weigher = weigher
+        self.weight = 0
+        self._entries = OrderedDict()  # chave -> (expira_em, valor)
+        self._weights = {}  # chave -> peso (apenas com maxweight)
+        self._inflight = {}  # chave -> Future da busca em andamento
+        self._lock = threading.Lock()
+
+        # Contadores para dimensionamento do cache
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor armazenado se ainda for válido"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                self.misses += 1
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float]):
+        """
+        Armazena um valor
+
+        Args:
+            key: Chave da entrada
+            value: Valor a armazenar
+            ttl (float, opcional): Tempo de vida em segundos (None não expira)
+        """
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float],
+                    cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Retorna o valor em cache ou executa a busca uma única vez
+
+        Chamadas concorrentes para a mesma chave aguardam a busca já em
+        andamento em vez de dispararem novas buscas.
+
+        Args:
+            key: Chave da entrada
+            loader (Callable): Função que obtém o valor quando não está em cache
+            ttl (float, opcional): Tempo de vida em segundos
+            cache_if (Callable, opcional): Predicado que decide se o valor deve ser armazenado
+
+        Returns:
+            Valor em cache ou recém-obtido
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                self.misses += 1
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if cache_if is None or cache_if(value):
+                self._store(key, value, ttl)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, key: Hashable):
+        """Remove uma entrada do cache"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._forget(key)
+
+    def clear(self):
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            self._entries.clear()
+            self._weights.clear()
+            self.weight = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna os contadores de uso do cache"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            stats = {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0
+            }
+            if self.maxweight is not None:
+                stats.update({"weight": self.weight, "maxweight": self.maxweight})
+            return stats
+
+    def _lookup(self, key: Hashable) -> Any:
+        """Busca uma entrada válida (chamar com o lock adquirido)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            self._forget(key)
+            self.expirations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float]):
+        """Grava uma entrada e descarta as menos usadas (chamar com o lock adquirido)"""
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        if self.maxweight is not None:
+            self._forget(key)
+            weight = self.weigher(value)
+            self._weights[key] = weight
+            self.weight += weight
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while self._entries and (len(self._entries) > self.maxsize or
+                                 (self.maxweight is not None and self.weight > self.maxweight)):
+            evicted, _ = self._entries.popitem(last=False)
+            self._forget(evicted)
+            self.evictions += 1
+
+    def _forget(self, key: Hashable):
+        """Desconta o peso de uma entrada removida (chamar com o lock adquirido)"""
+        self.weight -= self._weights.pop(key, 0)
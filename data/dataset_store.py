@@ -0,0 +1,231 @@
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .cache import TTLCache
+
+# Identificadores gerados por save (impede caminhos arbitrários em load)
+DATASET_ID_PATTERN = re.compile(r'^data_[0-9a-f]{32}$')
+
+
+class DatasetStore:
+    """
+    Armazenamento em disco dos dados enviados, um arquivo NumPy por coluna
+
+    Cada conjunto de dados fica em um diretório próprio, gravado de forma
+    atômica; por estar em disco, sobrevive a reinícios e é compartilhado entre
+    os workers do servidor. As colunas podem ser lidas mapeadas em memória, e
+    os conjuntos mais usados ficam em um cache limitado pelo tamanho em memória.
+    """
+
+    def __init__(self, root_dir: str, max_datasets: Optional[int] = None,
+                 ttl_hours: Optional[float] = None, memory_budget_mb: Optional[float] = None):
+        """
+        Inicializa o armazenamento
+
+        Args:
+            root_dir (str): Diretório onde os conjuntos são gravados
+            max_datasets (int, opcional): Conjuntos mantidos em disco; os usados há
+                mais tempo são removidos. Padrão: DATASET_MAX_COUNT (100)
+            ttl_hours (float, opcional): Horas sem uso até um conjunto ser removido.
+                Padrão: DATASET_TTL_HOURS (168)
+            memory_budget_mb (float, opcional): Memória para conjuntos carregados.
+                Padrão: DATASET_MEMORY_MB (256)
+        """
+        self.root_dir = root_dir
+        self.max_datasets = max_datasets or int(os.getenv("DATASET_MAX_COUNT", "100"))
+        self.ttl_seconds = (ttl_hours or float(os.getenv("DATASET_TTL_HOURS", "168"))) * 3600
+        budget = memory_budget_mb or float(os.getenv("DATASET_MEMORY_MB", "256"))
+
+        self.hot = TTLCache(
+            maxsize=self.max_datasets,
+            maxweight=int(budget * 1024 * 1024),
+            weigher=lambda df: int(df.memory_usage(index=True, deep=True).sum())
+        )
+
+    def _dataset_dir(self, data_id: str) -> Optional[str]:
+        """Retorna o diretório de um conjunto, ou None se o identificador for inválido"""
+        if not DATASET_ID_PATTERN.match(data_id):
+            return None
+        return os.path.join(self.root_dir, data_id)
+
+    def save(self, data: pd.DataFrame, filename: Optional[str] = None,
+             attrs: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Grava um conjunto de dados e retorna seu identificador
+
+        Colunas numéricas e de data mantêm o tipo; as demais são gravadas como texto.
+
+        Args:
+            data (pandas.DataFrame): Dados a gravar
+            filename (str, opcional): Nome do arquivo de origem (guardado nos metadados)
+            attrs (Dict, opcional): Resultados derivados pequenos (serializáveis em JSON),
+                lidos com read_attrs
+
+        Returns:
+            str: Identificador único do conjunto (ex: 'data_3f2a...')
+        """
+        data_id = f"data_{uuid.uuid4().hex}"
+        os.makedirs(self.root_dir, exist_ok=True)
+
+        # Grava em um diretório temporário e o renomeia quando completo
+        tmp_dir = os.path.join(self.root_dir, f".{data_id}.tmp")
+        os.makedirs(tmp_dir)
+        columns = []
+        for position, name in enumerate(data.columns):
+            values, kind = self._column_values(data[name])
+            filename_npy = f"col{position}.npy"
+            np.save(os.path.join(tmp_dir, filename_npy), values)
+            columns.append({"name": str(name), "kind": kind, "file": filename_npy})
+
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                "rows": len(data),
+                "columns": columns,
+                "filename": filename,
+                "attrs": attrs or {},
+                "created_at": time.time()
+            }, f)
+        os.replace(tmp_dir, os.path.join(self.root_dir, data_id))
+
+        self.evict()
+        return data_id
+
+    @staticmethod
+    def _column_values(series: pd.Series):
+        """Converte uma coluna para um array NumPy que pode ser mapeado em memória"""
+        if isinstance(series.dtype, pd.DatetimeTZDtype):
+            series = series.dt.tz_convert(None)
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            return series.to_numpy(dtype='datetime64[ns]'), "datetime"
+        if pd.api.types.is_bool_dtype(series.dtype) and not series.isna().any():
+            return series.to_numpy(dtype=bool), "bool"
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            if pd.api.types.is_integer_dtype(series.dtype) and not series.isna().any():
+                return series.to_numpy(dtype=np.int64), "int"
+            return series.to_numpy(dtype=np.float64, na_value=np.nan), "float"
+        # Texto com largura fixa (dtype 'U'), que o NumPy mapeia sem objetos Python
+        return series.fillna('').astype(str).to_numpy(dtype=str), "str"
+
+    def _read_meta(self, dataset_dir: str) -> Optional[Dict[str, Any]]:
+        """Lê os metadados do conjunto ou retorna None se não existir"""
+        try:
+            with open(os.path.join(dataset_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def exists(self, data_id: str) -> bool:
+        """Indica se o conjunto está armazenado"""
+        dataset_dir = self._dataset_dir(data_id)
+        return dataset_dir is not None and os.path.exists(os.path.join(dataset_dir, 'meta.json'))
+
+    def _touch(self, data_id: str) -> bool:
+        """
+        Registra o uso do conjunto (base da remoção dos menos usados, compartilhada entre workers)
+
+        Returns:
+            bool: False se o conjunto não existir mais em disco
+        """
+        dataset_dir = self._dataset_dir(data_id)
+        if dataset_dir is None:
+            return False
+        try:
+            os.utime(os.path.join(dataset_dir, 'meta.json'))
+            return True
+        except OSError:
+            return False
+
+    def read_columns(self, data_id: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Lê as colunas de um conjunto mapeadas em memória (sem cópia)
+
+        Args:
+            data_id (str): Identificador retornado por save
+
+        Returns:
+            Dict[str, numpy.ndarray]: Colunas somente leitura, ou None se o conjunto não existir
+        """
+        dataset_dir = self._dataset_dir(data_id)
+        meta = self._read_meta(dataset_dir) if dataset_dir is not None else None
+        if meta is None:
+            return None
+
+        self._touch(data_id)
+        return {
+            column["name"]: np.load(os.path.join(dataset_dir, column["file"]), mmap_mode='r')
+            for column in meta["columns"]
+        }
+
+    def read_attrs(self, data_id: str) -> Dict[str, Any]:
+        """Resultados derivados gravados com o conjunto (vazio se não houver)"""
+        dataset_dir = self._dataset_dir(data_id)
+        meta = self._read_meta(dataset_dir) if dataset_dir is not None else None
+        return (meta or {}).get("attrs", {})
+
+    def load(self, data_id: str) -> Optional[pd.DataFrame]:
+        """
+        Carrega um conjunto como DataFrame, mantendo os mais usados em memória
+
+        O DataFrame retornado é compartilhado entre requisições: copie antes de alterar.
+
+        Args:
+            data_id (str): Identificador retornado por save
+
+        Returns:
+            pandas.DataFrame: Dados do conjunto, ou None se não existir
+        """
+        # Conjuntos removidos (inclusive por outro worker) também saem da memória
+        if not self._touch(data_id):
+            self.hot.invalidate(data_id)
+            return None
+
+        def read():
+            columns = self.read_columns(data_id)
+            if columns is None:
+                return None
+            return pd.DataFrame({name: np.array(values) for name, values in columns.items()})
+
+        return self.hot.get_or_load(data_id, read, ttl=self.ttl_seconds, cache_if=lambda df: df is not None)
+
+    def delete(self, data_id: str):
+        """Remove um conjunto do disco e da memória"""
+        self.hot.invalidate(data_id)
+        dataset_dir = self._dataset_dir(data_id)
+        if dataset_dir is not None:
+            shutil.rmtree(dataset_dir, ignore_errors=True)
+
+    def evict(self):
+        """Remove conjuntos sem uso há mais de ttl_hours e os excedentes de max_datasets"""
+        try:
+            names = [name for name in os.listdir(self.root_dir) if DATASET_ID_PATTERN.match(name)]
+        except FileNotFoundError:
+            return
+
+        last_used = {}
+        for name in names:
+            try:
+                last_used[name] = os.path.getmtime(os.path.join(self.root_dir, name, 'meta.json'))
+            except OSError:
+                continue
+
+        now = time.time()
+        ordered = sorted(last_used, key=last_used.get, reverse=True)
+        for position, name in enumerate(ordered):
+            if position >= self.max_datasets or now - last_used[name] > self.ttl_seconds:
+                self.delete(name)
+
+    def stats(self) -> Dict[str, Any]:
+        """Conjuntos em disco e contadores do cache em memória"""
+        try:
+            stored = sum(1 for name in os.listdir(self.root_dir) if DATASET_ID_PATTERN.match(name))
+        except FileNotFoundError:
+            stored = 0
+        return {"stored": stored, "max_datasets": self.max_datasets, "memory": self.hot.stats()}
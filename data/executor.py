@@ -0,0 +1,37 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class BlockingExecutor:
+    """Executa funções bloqueantes em um pool de threads limitado, fora do event loop"""
+
+    def __init__(self, max_workers: int, name: str):
+        """
+        Inicializa o executor
+
+        Args:
+            max_workers (int): Número máximo de execuções simultâneas
+            name (str): Prefixo do nome das threads (facilita a depuração)
+        """
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Executa uma função bloqueante no pool e aguarda o resultado
+
+        Args:
+            func (Callable): Função a executar
+            *args, **kwargs: Argumentos repassados à função
+
+        Returns:
+            Resultado da função
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        """Encerra o pool de threads"""
+        self._executor.shutdown(wait=wait)
@@ -1,11 +1,61 @@
-import yfinance as yf
+import os
+import threading
+import time
+from contextlib import ExitStack
 import pandas as pd
 from datetime import datetime, timedelta
+from typing import Optional
+
+from .backends import MarketDataBackend, create_backend
+from .bar_store import BarStore
+from .cache import TTLCache
+from .executor import BlockingExecutor
+from .indicators import IndicatorEngine
+from .ohlc_frame import OHLCFrame
+from .quotes import QuoteService
+from .scanner import MarketScanner
+from .summary import summary_history_days, window_stats
+from .resample import TIMEFRAMES, resample_ohlc
 
 class ForexDataProvider:
     """Provedor de dados para o mercado Forex"""
     
-    def __init__(self):
+    # Tempo de vida (segundos) das entradas em cache por timeframe
+    CACHE_TTL = {
+        '1h': 60,
+        '2h': 120,
+        '4h': 120,
+        '1d': 300,
+        '1wk': 900
+    }
+    
+    # Tempo de vida (segundos) do preço atual em cache
+    PRICE_CACHE_TTL = 15
+    
+    # Dias extras de histórico usados para aquecer os indicadores (~60+ barras antes do período)
+    INDICATOR_WARMUP_DAYS = {
+        '1h': 5,
+        '2h': 10,
+        '4h': 20,
+        '1d': 30,
+        '1wk': 140
+    }
+    
+    def __init__(self, bar_store: Optional[BarStore] = None, cache: Optional[TTLCache] = None,
+                 executor: Optional[BlockingExecutor] = None, backend: Optional[MarketDataBackend] = None):
+        """
+        Inicializa o provedor de dados
+        
+        Args:
+            backend (MarketDataBackend, opcional): Fonte de dados de mercado. Se não
+                informada, usa a definida em MARKET_DATA_BACKEND (padrão 'yfinance')
+            bar_store (BarStore, opcional): Armazenamento local de barras. Se não
+                informado, usa o diretório definido em BAR_STORE_DIR (vazio desativa)
+            cache (TTLCache, opcional): Cache em memória das consultas. Se não
+                informado, cria um com DATA_CACHE_SIZE entradas
+            executor (BlockingExecutor, opcional): Pool usado pelos métodos assíncronos.
+                Se não informado, cria um com DATA_MAX_WORKERS threads
+        """
         # Pares de moedas comuns no Forex
         self.available_pairs = [
             'EURUSD=X', 'GBPUSD=X', 'USDJPY=X', 'AUDUSD=X', 
@@ -16,96 +66,235 @@ class ForexDataProvider:
         self.b3_assets = [
             'WINFUT', 'WDOFUT'  # Mini Índice Futuro e Mini Dólar Futuro
         ]
+        
+        # Fonte dos dados de mercado
+        self.backend = backend if backend is not None else create_backend()
+        
+        # Armazenamento local das barras já baixadas (separado por fonte de dados)
+        if bar_store is None:
+            store_dir = os.getenv("BAR_STORE_DIR", os.path.join(".cache", "bars"))
+            bar_store = BarStore(os.path.join(store_dir, self.backend.name)) if store_dir else None
+        self.bar_store = bar_store
+        
+        # Cache em memória das consultas, compartilhado entre requisições
+        if cache is None:
+            cache = TTLCache(maxsize=int(os.getenv("DATA_CACHE_SIZE", "256")))
+        self.cache = cache
+        
+        # Pool de threads para as consultas bloqueantes chamadas a partir do event loop
+        if executor is None:
+            executor = BlockingExecutor(int(os.getenv("DATA_MAX_WORKERS", "8")), "forex-data")
+        self.executor = executor
+        
+        # Locks por série para evitar gravações concorrentes no armazenamento local
+        self._series_locks = {}
+        self._series_locks_guard = threading.Lock()
+        
+        # Tabela de cotações atualizada em segundo plano (iniciada com start_quote_service)
+        self.quotes = QuoteService(
+            self.backend,
+            {symbol: self._resolve_symbol(symbol) for symbol in self.get_available_pairs() + self.b3_assets},
+            refresh_interval=float(os.getenv("QUOTE_REFRESH_SECONDS", "15"))
+        )
+        
+        # Motores de indicadores por (símbolo, timeframe), atualizados incrementalmente
+        self._indicator_engines = {}
+        self._indicator_engines_guard = threading.Lock()
+        
+        # Scanner de mercado (métricas e correlações de todos os ativos)
+        self.scanner = MarketScanner(self)
     
     def get_available_pairs(self):
         """Retorna a lista de pares disponíveis"""
         return [pair.replace('=X', '') for pair in self.available_pairs]
     
+    def _resolve_symbol(self, symbol):
+        """
+        Valida um par de moedas ou ativo B3 e o converte para o símbolo da fonte de dados
+        
+        Args:
+            symbol (str): Par de moedas (ex: 'EURUSD') ou ativo B3 (ex: 'WINFUT')
+            
+        Returns:
+            str: Símbolo na fonte de dados
+        """
+        # Verifica se é um ativo B3
+        if symbol in self.b3_assets:
+            return self.backend.resolve_symbol(symbol)
+        
+        # Adiciona o sufixo =X se não estiver presente (para Forex)
+        if not symbol.endswith('=X'):
+            symbol = f"{symbol}=X"
+            
+        # Verifica se o símbolo está disponível
+        if symbol not in self.available_pairs:
+            raise ValueError(f"Par de moedas {symbol} não disponível")
+        
+        return self.backend.resolve_symbol(symbol.replace('=X', ''))
+    
+    @staticmethod
+    def _to_local_naive(timestamp):
+        """Converte um horário de barra para datetime local sem fuso (como datetime.now())"""
+        timestamp = timestamp.to_pydatetime()
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        return timestamp
+    
+    def _load_bars(self, source_symbols, interval, start_date, end_date):
+        """
+        Obtém as barras do período, usando o armazenamento local quando disponível
+        
+        Com o armazenamento ativo, apenas o trecho ainda não armazenado é baixado:
+        o início (se o período pedido for mais antigo que o já consultado) e o
+        final a partir da última barra gravada, que é rebaixada por poder estar
+        incompleta. Todos os símbolos são baixados em uma única chamada, a partir
+        da data mais antiga que algum deles precisa.
+        """
+        if self.bar_store is None:
+            return self.backend.download(source_symbols, start_date, end_date, interval)
+        
+        with ExitStack() as stack:
+            # Ordena os locks para evitar impasse entre consultas em lote
+            for source_symbol in sorted(source_symbols):
+                stack.enter_context(self._series_lock(source_symbol, interval))
+            return self._load_stored_bars(source_symbols, interval, start_date, end_date)
+    
+    def _series_lock(self, source_symbol, interval):
+        """Retorna o lock da série (símbolo, intervalo) no armazenamento local"""
+        with self._series_locks_guard:
+            key = (source_symbol, interval)
+            if key not in self._series_locks:
+                self._series_locks[key] = threading.Lock()
+            return self._series_locks[key]
+    
+    def _load_stored_bars(self, source_symbols, interval, start_date, end_date):
+        """Completa as séries armazenadas com as barras que faltam e lê o período"""
+        fetch_from = []
+        for source_symbol in source_symbols:
+            first_bar, last_bar, covered_from = self.bar_store.bounds(source_symbol, interval)
+            if last_bar is None or start_date < covered_from:
+                # Série vazia ou período pedido anterior ao já consultado
+                fetch_from.append(start_date)
+            else:
+                # Completa o final da série a partir da última barra armazenada
+                fetch_from.append(self._to_local_naive(last_bar))
+        
+        batch_start = min(fetch_from)
+        downloaded = self.backend.download(source_symbols, batch_start, end_date, interval)
+        
+        result = {}
+        for source_symbol in source_symbols:
+            self.bar_store.merge(source_symbol, interval, downloaded[source_symbol], covered_from=batch_start)
+            result[source_symbol] = self.bar_store.read(source_symbol, interval, start=start_date)
+        
+        return result
+    
     def get_ohlc_data(self, symbol, timeframe='1d', days_back=2):
         """
         Obtém dados OHLC para um par de moedas ou ativo B3
         
+        Resultados são mantidos em cache por um tempo que depende do timeframe;
+        requisições simultâneas para a mesma consulta compartilham um único download.
+        O DataFrame retornado é compartilhado e não deve ser modificado.
+        
         Args:
             symbol (str): Par de moedas (ex: 'EURUSD') ou ativo B3 (ex: 'WINFUT')
-            timeframe (str): Intervalo de tempo ('1h', '4h', '1d')
+            timeframe (str): Intervalo de tempo ('1h', '2h', '4h', '1d', '1wk')
             days_back (int): Número de dias para retornar
             
         Returns:
             pandas.DataFrame: Dados OHLC
         """
-        # Verifica se é um ativo B3
-        if symbol in self.b3_assets:
-            # Para ativos B3, usa símbolos específicos do Yahoo Finance
-            if symbol == 'WINFUT':
-                yf_symbol = '^BVSP'  # Índice Bovespa como proxy para mini índice
-            elif symbol == 'WDOFUT':
-                yf_symbol = 'USDBRL=X'  # Par USD/BRL como proxy para mini dólar
-            else:
-                raise ValueError(f"Ativo B3 {symbol} não suportado")
-        else:
-            # Adiciona o sufixo =X se não estiver presente (para Forex)
-            if not symbol.endswith('=X'):
-                symbol = f"{symbol}=X"
-                
-            # Verifica se o símbolo está disponível
-            if symbol not in self.available_pairs:
-                raise ValueError(f"Par de moedas {symbol} não disponível")
+        return self.cache.get_or_load(
+            ('ohlc', symbol, timeframe, days_back),
+            lambda: self._fetch_ohlc_data([symbol], timeframe, days_back)[symbol],
+            ttl=self.CACHE_TTL.get(timeframe, self.CACHE_TTL['1d']),
+            cache_if=lambda data: not data.empty
+        )
+    
+    def get_ohlc_data_many(self, symbols, timeframe='1d', days_back=2):
+        """
+        Obtém dados OHLC de vários pares de moedas ou ativos B3 de uma só vez
+        
+        Os símbolos que não estão em cache são baixados em uma única chamada
+        à fonte de dados, em vez de uma chamada por símbolo. Símbolos inválidos
+        não interrompem o lote: recebem um DataFrame vazio.
+        
+        Args:
+            symbols (List[str]): Pares de moedas (ex: 'EURUSD') e/ou ativos B3 (ex: 'WINFUT')
+            timeframe (str): Intervalo de tempo ('1h', '2h', '4h', '1d', '1wk')
+            days_back (int): Número de dias para retornar
             
-            yf_symbol = symbol
+        Returns:
+            Dict[str, pandas.DataFrame]: Dados OHLC por símbolo
+        """
+        ttl = self.CACHE_TTL.get(timeframe, self.CACHE_TTL['1d'])
+        
+        results = {}
+        missing = []
+        for symbol in symbols:
+            data = self.cache.get(('ohlc', symbol, timeframe, days_back))
+            if data is not None:
+                results[symbol] = data
+            elif symbol not in missing:
+                missing.append(symbol)
         
-        # Mapeia timeframe para formato yfinance
-        timeframe_map = {
-            '1h': '1h',
-            '4h': '4h',
-            '1d': '1d'
-        }
+        # Valida cada símbolo individualmente: um símbolo desconhecido não descarta os demais
+        valid = []
+        for symbol in missing:
+            try:
+                self._resolve_symbol(symbol)
+                valid.append(symbol)
+            except ValueError as e:
+                print(f"Ignorando {symbol} na consulta em lote: {e}")
+                results[symbol] = pd.DataFrame()
+        
+        if valid:
+            fetched = self._fetch_ohlc_data(valid, timeframe, days_back)
+            for symbol, data in fetched.items():
+                if not data.empty:
+                    self.cache.set(('ohlc', symbol, timeframe, days_back), data, ttl)
+                results[symbol] = data
+        
+        return {symbol: results[symbol] for symbol in symbols}
+    
+    def _fetch_ohlc_data(self, symbols, timeframe, days_back):
+        """Obtém dados OHLC de um ou mais símbolos sem passar pelo cache em memória"""
+        source_symbols = {symbol: self._resolve_symbol(symbol) for symbol in symbols}
         
-        interval = timeframe_map.get(timeframe, '1d')
+        # Mapeia timeframe para o intervalo base obtido da fonte de dados;
+        # timeframes maiores são agregados localmente a partir dele
+        interval, resample_rule = TIMEFRAMES.get(timeframe, TIMEFRAMES['1d'])
         
         # Calcula datas de início e fim
         end_date = datetime.now()
         
         # Para intervalos intradiários, precisamos de mais dias para obter os dados corretos
-        if interval in ['1h', '4h']:
+        if interval == '1h':
             # Para dados intradiários, yfinance tem limitações de histórico
             # Adicionamos mais dias para garantir que temos dados suficientes
             start_date = end_date - timedelta(days=max(days_back * 7, 14))  # Mínimo 14 dias
-            period = f"{max(days_back * 7, 14)}d"
         else:
             # Para dados diários, usa período fixo para garantir dados
             start_date = end_date - timedelta(days=max(days_back * 3, 7))  # Mínimo 7 dias
-            period = f"{max(days_back * 3, 7)}d"
         
-        # Obtém os dados do yfinance
+        # Obtém os dados do armazenamento local e/ou da fonte de dados
         try:
-            data = yf.download(
-                yf_symbol,
-                start=start_date,
-                end=end_date,
-                interval=interval,
-                progress=False,
-                auto_adjust=True
-            )
+            bars = self._load_bars(list(dict.fromkeys(source_symbols.values())), interval, start_date, end_date)
+        except Exception as e:
+            print(f"Erro ao obter dados para {', '.join(source_symbols.values())}: {e}")
+            return {symbol: pd.DataFrame() for symbol in symbols}
+        
+        result = {}
+        for symbol, source_symbol in source_symbols.items():
+            data = bars[source_symbol]
             
-            # Se não houver dados, retorna DataFrame vazio
-            if data.empty:
-                return pd.DataFrame()
-                
-            # Achata as colunas multi-level se necessário
-            if isinstance(data.columns, pd.MultiIndex):
-                data.columns = [col[0].lower() if col[0] else col[1].lower() for col in data.columns]
-            else:
-                # Renomeia as colunas para o formato padrão
-                data = data.rename(columns={
-                    'Open': 'open',
-                    'High': 'high',
-                    'Low': 'low',
-                    'Close': 'close',
-                    'Volume': 'volume'
-                })
+            # Agrega as barras base no timeframe solicitado, conforme a sessão do ativo
+            if resample_rule is not None:
+                data = resample_ohlc(data, resample_rule, session='b3' if symbol in self.b3_assets else 'fx')
             
             # Para timeframes intradiários, filtra apenas os dias solicitados
-            if interval in ['1h', '4h']:
+            if not data.empty and interval == '1h':
                 # Filtra apenas os últimos 'days_back' dias
                 cutoff_date = end_date - timedelta(days=days_back)
                 # Converte cutoff_date para timezone-aware se necessário
@@ -115,11 +304,39 @@ class ForexDataProvider:
                     cutoff_date = cutoff_date.replace(tzinfo=None)
                 data = data[data.index >= cutoff_date]
             
-            return data
+            result[symbol] = data
+        
+        return result
+    
+    def start_quote_service(self):
+        """Inicia a atualização periódica das cotações em segundo plano"""
+        self.quotes.start()
+    
+    def stop_quote_service(self):
+        """Interrompe a atualização periódica das cotações"""
+        self.quotes.stop()
+    
+    def get_current_quote(self, symbol):
+        """
+        Obtém o preço atual de um par de moedas ou ativo B3 com a idade da cotação
+        
+        Com o serviço de cotações ativo, a leitura vem da tabela em memória;
+        caso contrário (ou se a cotação estiver desatualizada), consulta a fonte.
+        
+        Args:
+            symbol (str): Par de moedas (ex: 'EURUSD') ou ativo B3 (ex: 'WINFUT')
             
-        except Exception as e:
-            print(f"Erro ao obter dados para {yf_symbol}: {e}")
-            return pd.DataFrame()
+        Returns:
+            tuple: (preço, idade da cotação em segundos) ou None se não houver preço
+        """
+        if self.quotes.running:
+            quote = self.quotes.get(symbol)
+            # Aceita cotações de até dois ciclos de atualização
+            if quote is not None and quote[1] <= 2 * self.quotes.refresh_interval:
+                return quote
+        
+        price, fetched_at = self._get_cached_price(symbol)
+        return (price, time.time() - fetched_at) if price is not None else None
     
     def get_current_price(self, symbol):
         """
@@ -131,31 +348,120 @@ class ForexDataProvider:
         Returns:
             float: Preço atual
         """
-        # Verifica se é um ativo B3
+        quote = self.get_current_quote(symbol)
+        return quote[0] if quote is not None else None
+    
+    def _get_cached_price(self, symbol):
+        """Obtém o preço atual da fonte de dados (e o horário da consulta), passando pelo cache em memória"""
+        return self.cache.get_or_load(
+            ('price', symbol),
+            lambda: (self._fetch_current_price(symbol), time.time()),
+            ttl=self.PRICE_CACHE_TTL,
+            cache_if=lambda quote: quote[0] is not None
+        )
+    
+    def _fetch_current_price(self, symbol):
+        """Obtém o preço atual sem passar pelo cache em memória"""
         if symbol in self.b3_assets:
-            # Para ativos B3, usa símbolos específicos do Yahoo Finance
-            if symbol == 'WINFUT':
-                yf_symbol = '^BVSP'  # Índice Bovespa como proxy para mini índice
-            elif symbol == 'WDOFUT':
-                yf_symbol = 'USDBRL=X'  # Par USD/BRL como proxy para mini dólar
-            else:
-                raise ValueError(f"Ativo B3 {symbol} não suportado")
+            source_symbol = self.backend.resolve_symbol(symbol)
         else:
-            # Adiciona o sufixo =X se não estiver presente (para Forex)
-            if not symbol.endswith('=X'):
-                symbol = f"{symbol}=X"
-            yf_symbol = symbol
+            source_symbol = self.backend.resolve_symbol(symbol.replace('=X', ''))
         
         try:
-            ticker = yf.Ticker(yf_symbol)
-            data = ticker.history(period='1d')
-            
-            if data.empty:
-                return None
-                
-            return data['Close'].iloc[-1]
+            return self.backend.get_last_price(source_symbol)
             
         except Exception as e:
             print(f"Erro ao obter preço atual para {symbol}: {e}")
             return None
-            
\ No newline at end of file
+    
+    def get_ohlc_frame(self, symbol, timeframe='1d', days_back=2):
+        """
+        Obtém os dados OHLC e indicadores de um ativo como OHLCFrame, pronto para exibição
+        
+        O frame (sem fins de semana e com os indicadores alinhados) é montado uma
+        vez e mantido em cache junto com os dados; tabela, gráfico e resumo o
+        compartilham sem conversões.
+        
+        Args:
+            symbol (str): Par de moedas (ex: 'EURUSD') ou ativo B3 (ex: 'WINFUT')
+            timeframe (str): Intervalo de tempo ('1h', '2h', '4h', '1d', '1wk')
+            days_back (int): Número de dias para retornar
+            
+        Returns:
+            OHLCFrame: Barras e indicadores (vazio se não houver dados)
+        """
+        def build():
+            data = self.get_ohlc_data(symbol, timeframe, days_back)
+            indicators = self.get_indicators(symbol, timeframe, days_back, data=data) if not data.empty else None
+            return OHLCFrame.from_dataframe(symbol, timeframe, data, indicators)
+        
+        return self.cache.get_or_load(
+            ('frame', symbol, timeframe, days_back),
+            build,
+            ttl=self.CACHE_TTL.get(timeframe, self.CACHE_TTL['1d']),
+            cache_if=lambda frame: not frame.empty
+        )
+    
+    def get_indicators(self, symbol, timeframe='1d', days_back=2, data=None):
+        """
+        Obtém os indicadores técnicos de um par de moedas ou ativo B3
+        
+        Os indicadores são calculados sobre um histórico mais longo que o período
+        pedido, para que já estejam disponíveis na primeira barra exibida. Cada
+        (símbolo, timeframe) tem um IndicatorEngine próprio: a cada nova consulta,
+        só as barras acrescentadas desde a anterior são calculadas.
+        
+        Args:
+            symbol (str): Par de moedas (ex: 'EURUSD') ou ativo B3 (ex: 'WINFUT')
+            timeframe (str): Intervalo de tempo ('1h', '2h', '4h', '1d', '1wk')
+            days_back (int): Número de dias para retornar
+            data (pandas.DataFrame, opcional): Dados OHLC já obtidos com get_ohlc_data
+            
+        Returns:
+            pandas.DataFrame: Indicadores alinhados às barras de get_ohlc_data
+        """
+        if data is None:
+            data = self.get_ohlc_data(symbol, timeframe, days_back)
+        
+        warmup_days = self.INDICATOR_WARMUP_DAYS.get(timeframe, self.INDICATOR_WARMUP_DAYS['1d'])
+        history = self.get_ohlc_data(symbol, timeframe, days_back + warmup_days)
+        if history.empty:
+            history = data
+        
+        with self._indicator_engines_guard:
+            engine = self._indicator_engines.get((symbol, timeframe))
+            if engine is None:
+                engine = self._indicator_engines[(symbol, timeframe)] = IndicatorEngine()
+        
+        return engine.update(history).reindex(data.index)
+    
+    def get_window_stats(self, symbol):
+        """
+        Obtém o resumo de vários horizontes (1d, 5d, 20d e no ano) de um ativo
+        
+        Usa as barras diárias do ativo, independentemente do timeframe exibido; o
+        resultado é calculado em uma única passagem e mantido em cache por versão
+        dos dados.
+        
+        Args:
+            symbol (str): Par de moedas (ex: 'EURUSD') ou ativo B3 (ex: 'WINFUT')
+            
+        Returns:
+            Tuple[Dict[str, Dict], str]: Métricas por horizonte e versão das barras
+                diárias usadas (vazio e None se não houver dados)
+        """
+        data = self.get_ohlc_data(symbol, '1d', summary_history_days())
+        if data.empty:
+            return {}, None
+        
+        frame = OHLCFrame.from_dataframe(symbol, '1d', data)
+        stats = self.cache.get_or_load(('summary', frame.version), lambda: window_stats(frame), ttl=None)
+        return stats, frame.version
+    
+    async def get_window_stats_async(self, symbol):
+        """Versão assíncrona de get_window_stats, executada no pool de threads do provedor"""
+        return await self.executor.run(self.get_window_stats, symbol)
+    
+    def cache_stats(self):
+        """Retorna os contadores de uso do cache em memória"""
+        return self.cache.stats()
@@ -0,0 +1,303 @@
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _ewm(values: np.ndarray, alpha: float, initial: Optional[float] = None) -> np.ndarray:
+    """
+    Média exponencial recursiva y[i] = alpha * x[i] + (1 - alpha) * y[i-1]
+
+    A recursão é resolvida em blocos com somas acumuladas (sem laço por barra).
+    O tamanho do bloco limita o fator (1 - alpha)^-i para manter a precisão.
+
+    Args:
+        values (numpy.ndarray): Série de entrada
+        alpha (float): Fator de suavização (0 < alpha <= 1)
+        initial (float, opcional): Valor anterior ao primeiro elemento. Se não
+            informado, a média começa no primeiro valor da série
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    out = np.empty(n)
+    if n == 0:
+        return out
+
+    decay = 1.0 - alpha
+    if decay <= 0:
+        out[:] = x
+        return out
+
+    block = int(min(4096, max(1, 8 / -np.log10(decay))))
+    steps = np.arange(block)
+    carry = decay ** (steps + 1)   # peso do valor anterior ao bloco
+    scale = decay ** -steps        # fator que torna a recursão uma soma acumulada
+
+    prev = x[0] if initial is None else initial
+    for start in range(0, n, block):
+        chunk = x[start:start + block]
+        m = len(chunk)
+        acc = np.cumsum(chunk * scale[:m]) * (alpha / scale[:m])
+        out[start:start + m] = carry[:m] * prev + acc
+        prev = out[start + m - 1]
+
+    return out
+
+
+def _rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+    """Média móvel simples (NaN enquanto não houver barras suficientes)"""
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        cumsum = np.cumsum(np.r_[0.0, values])
+        out[period - 1:] = (cumsum[period:] - cumsum[:-period]) / period
+    return out
+
+
+def _rolling_std(values: np.ndarray, period: int) -> np.ndarray:
+    """Desvio padrão móvel (populacional; NaN enquanto não houver barras suficientes)"""
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        out[period - 1:] = sliding_window_view(values, period).std(axis=1)
+    return out
+
+
+def _mask_warmup(values: np.ndarray, first_valid: int, offset: int = 0) -> np.ndarray:
+    """Marca como NaN as barras anteriores a first_valid (posição absoluta na série)"""
+    cut = first_valid - offset
+    if cut > 0:
+        values[:cut] = np.nan
+    return values
+
+
+def _rsi_from_averages(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    """Converte as médias de ganhos e perdas em RSI (100 quando não há perdas)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray, prev_close: Optional[float] = None) -> np.ndarray:
+    """True range de cada barra (a primeira usa máxima - mínima se não houver fechamento anterior)"""
+    previous = np.r_[close[:1] if prev_close is None else prev_close, close[:-1]]
+    true_range = np.maximum(high, previous) - np.minimum(low, previous)
+    if prev_close is None and len(true_range):
+        true_range[0] = high[0] - low[0]
+    return true_range
+
+
+class IndicatorEngine:
+    """
+    Calcula indicadores técnicos de uma série OHLC e os atualiza incrementalmente
+
+    O motor guarda o estado das médias recursivas (EMA, RSI, ATR, MACD) e as
+    últimas barras necessárias às janelas móveis. Quando a série recebida só
+    acrescenta barras às já processadas, apenas as novas barras são calculadas;
+    a última barra é tratada como provisória (candle em formação) e é sempre
+    recalculada. Se o histórico anterior mudar, tudo é recalculado.
+    """
+
+    def __init__(self, sma_periods=(20, 50), ema_periods=(20,), rsi_period: int = 14, atr_period: int = 14,
+                 bollinger_period: int = 20, bollinger_std: float = 2.0, macd_periods=(12, 26, 9),
+                 volatility_period: int = 20, max_history: int = 20000):
+        """
+        Inicializa o motor de indicadores
+
+        Args:
+            sma_periods (tuple): Períodos das médias simples
+            ema_periods (tuple): Períodos das médias exponenciais
+            rsi_period (int): Período do RSI
+            atr_period (int): Período do ATR
+            bollinger_period (int): Período das Bandas de Bollinger
+            bollinger_std (float): Número de desvios padrão das bandas
+            macd_periods (tuple): Períodos (rápido, lento, sinal) do MACD
+            volatility_period (int): Janela da volatilidade dos retornos
+            max_history (int): Número máximo de barras mantidas em memória
+        """
+        self.sma_periods = tuple(sma_periods)
+        self.ema_periods = tuple(ema_periods)
+        self.rsi_period = rsi_period
+        self.atr_period = atr_period
+        self.bollinger_period = bollinger_period
+        self.bollinger_std = bollinger_std
+        self.macd_periods = tuple(macd_periods)
+        self.volatility_period = volatility_period
+        self.max_history = max_history
+
+        # Barras necessárias antes de uma nova barra para as janelas móveis
+        self._window = max(self.sma_periods + (bollinger_period, volatility_period + 1))
+
+        self._lock = threading.Lock()
+        self.full_computations = 0
+        self.incremental_updates = 0
+        self.reset()
+
+    def reset(self):
+        """Descarta o estado e os resultados calculados"""
+        self._index = np.empty(0, dtype=np.int64)   # barras confirmadas (todas menos a última)
+        self._values = {}                            # indicadores das barras confirmadas
+        self._state = None                           # estado após a última barra confirmada
+
+    @property
+    def columns(self):
+        """Nomes dos indicadores calculados"""
+        names = [f"sma_{period}" for period in self.sma_periods]
+        names += [f"ema_{period}" for period in self.ema_periods]
+        names += [f"rsi_{self.rsi_period}", f"atr_{self.atr_period}",
+                  "bb_upper", "bb_middle", "bb_lower",
+                  "macd", "macd_signal", "macd_hist",
+                  f"volatility_{self.volatility_period}"]
+        return names
+
+    def _compute(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, state: Optional[dict]):
+        """
+        Calcula os indicadores de um trecho da série a partir de um estado
+
+        Returns:
+            tuple: (indicadores do trecho, estado após a penúltima barra do trecho)
+        """
+        fresh = state is None
+        if fresh:
+            state = {'count': 0, 'prev_close': None, 'tail_close': np.empty(0), 'ewm': {}}
+        offset = state['count']
+        n_tail = len(state['tail_close'])
+        ewm_state = state['ewm']
+        new_ewm = {}
+
+        def recursive(name, values, alpha):
+            result = _ewm(values, alpha, ewm_state.get(name))
+            new_ewm[name] = result
+            return result
+
+        # Janelas móveis: o trecho é precedido pelas últimas barras confirmadas
+        window_close = np.r_[state['tail_close'], close]
+        out = {}
+        for period in self.sma_periods:
+            out[f"sma_{period}"] = _rolling_mean(window_close, period)[n_tail:]
+
+        for period in self.ema_periods:
+            out[f"ema_{period}"] = _mask_warmup(recursive(f"ema_{period}", close, 2.0 / (period + 1)).copy(), period - 1, offset)
+
+        delta = np.diff(close, prepend=close[:1] if state['prev_close'] is None else state['prev_close'])
+        avg_gain = recursive('avg_gain', np.maximum(delta, 0), 1.0 / self.rsi_period)
+        avg_loss = recursive('avg_loss', np.maximum(-delta, 0), 1.0 / self.rsi_period)
+        out[f"rsi_{self.rsi_period}"] = _mask_warmup(_rsi_from_averages(avg_gain, avg_loss), self.rsi_period, offset)
+
+        true_range = _true_range(high, low, close, state['prev_close'])
+        out[f"atr_{self.atr_period}"] = _mask_warmup(recursive('atr', true_range, 1.0 / self.atr_period).copy(), self.atr_period - 1, offset)
+
+        middle = _rolling_mean(window_close, self.bollinger_period)[n_tail:]
+        width = self.bollinger_std * _rolling_std(window_close, self.bollinger_period)[n_tail:]
+        out["bb_upper"] = middle + width
+        out["bb_middle"] = middle
+        out["bb_lower"] = middle - width
+
+        fast, slow, signal = self.macd_periods
+        line = recursive('macd_fast', close, 2.0 / (fast + 1)) - recursive('macd_slow', close, 2.0 / (slow + 1))
+        signal_line = recursive('macd_signal', line, 2.0 / (signal + 1))
+        out["macd"] = _mask_warmup(line.copy(), slow - 1, offset)
+        out["macd_signal"] = _mask_warmup(signal_line.copy(), slow + signal - 2, offset)
+        out["macd_hist"] = _mask_warmup(line - signal_line, slow + signal - 2, offset)
+
+        returns = np.r_[np.nan, np.diff(np.log(window_close))]
+        out[f"volatility_{self.volatility_period}"] = _rolling_std(returns, self.volatility_period)[n_tail:] * 100
+
+        # Estado após a penúltima barra: a última é provisória
+        m = len(close)
+        if m >= 2:
+            committed = {
+                'count': offset + m - 1,
+                'prev_close': close[-2],
+                'tail_close': window_close[:-1][-self._window:],
+                'ewm': {name: values[-2] for name, values in new_ewm.items()}
+            }
+        else:
+            committed = state
+
+        return out, committed
+
+    def update(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calcula os indicadores de uma série OHLC, reaproveitando as barras já processadas
+
+        Args:
+            data (pandas.DataFrame): Barras com colunas high/low/close, ordenadas por horário
+
+        Returns:
+            pandas.DataFrame: Indicadores alinhados ao índice de data
+        """
+        if data.empty:
+            return pd.DataFrame(index=data.index, columns=self.columns, dtype=np.float64)
+
+        index = data.index.as_unit('ns').asi8
+        high = data['high'].to_numpy(dtype=np.float64)
+        low = data['low'].to_numpy(dtype=np.float64)
+        close = data['close'].to_numpy(dtype=np.float64)
+
+        with self._lock:
+            # Posição da primeira barra recebida entre as barras confirmadas
+            start = int(np.searchsorted(self._index, index[0]))
+            known = len(self._index) - start
+            reusable = (
+                self._state is not None
+                and start < len(self._index)
+                and known < len(index)
+                and np.array_equal(self._index[start:], index[:known])
+                and close[known - 1] == self._state['prev_close']
+            )
+
+            if reusable:
+                # Só as barras novas (e a última, provisória) são calculadas
+                new, self._state = self._compute(high[known:], low[known:], close[known:], self._state)
+                values = {name: np.r_[self._values[name][start:], new[name]] for name in new}
+                self._index = np.r_[self._index, index[known:-1]]
+                self._values = {name: np.r_[self._values[name], new[name][:-1]] for name in new}
+                self.incremental_updates += 1
+            else:
+                new, self._state = self._compute(high, low, close, None)
+                values = new
+                self._index = index[:-1].copy()
+                self._values = {name: new[name][:-1].copy() for name in new}
+                self.full_computations += 1
+
+            # Limita a memória descartando as barras confirmadas mais antigas
+            if len(self._index) > self.max_history:
+                drop = len(self._index) - self.max_history
+                self._index = self._index[drop:]
+                self._values = {name: column[drop:] for name, column in self._values.items()}
+
+        return pd.DataFrame({name: values[name] for name in self.columns}, index=data.index)
+
+
+def compute_indicators(data: pd.DataFrame, **params) -> pd.DataFrame:
+    """
+    Calcula todos os indicadores de uma série OHLC de uma só vez
+
+    Args:
+        data (pandas.DataFrame): Barras com colunas high/low/close, ordenadas por horário
+        params: Parâmetros do IndicatorEngine
+
+    Returns:
+        pandas.DataFrame: Indicadores alinhados ao índice de data
+    """
+    return IndicatorEngine(**params).update(data)
+
+
+def latest_values(indicators, decimals: int = 5) -> Dict[str, float]:
+    """
+    Valores mais recentes de cada indicador (omitindo os ainda indisponíveis)
+
+    Args:
+        indicators (pandas.DataFrame ou Dict[str, numpy.ndarray]): Indicadores alinhados às barras
+        decimals (int): Casas decimais dos indicadores em unidades de preço
+    """
+    if isinstance(indicators, pd.DataFrame):
+        indicators = {name: indicators[name].to_numpy() for name in indicators.columns}
+
+    result = {}
+    for name, values in indicators.items():
+        if len(values) == 0 or np.isnan(values[-1]):
+            continue
+        digits = 1 if name.startswith('rsi') else 3 if name.startswith('volatility') else decimals
+        result[name] = round(float(values[-1]), digits)
+    return result
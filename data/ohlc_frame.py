@@ -0,0 +1,125 @@
+import hashlib
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class OHLCFrame:
+    """
+    Resultado OHLC em arrays NumPy, compartilhado por tabela, gráfico e resumo
+
+    Criado uma única vez por consulta, já com os fins de semana removidos. Os
+    arrays são somente leitura: as visualizações os consomem sem cópias e o
+    mesmo objeto pode ser reaproveitado entre requisições.
+    """
+
+    __slots__ = ('symbol', 'timeframe', 'index', 'open', 'high', 'low', 'close', 'volume',
+                 'indicators', 'version', '_labels')
+
+    def __init__(self, symbol: str, timeframe: str, index: pd.DatetimeIndex,
+                 open: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                 volume: Optional[np.ndarray] = None, indicators: Optional[Dict[str, np.ndarray]] = None):
+        """
+        Inicializa o frame (use from_dataframe para criar a partir do provedor)
+
+        Args:
+            symbol (str): Par de moedas ou ativo B3
+            timeframe (str): Intervalo de tempo das barras
+            index (pandas.DatetimeIndex): Horário de cada barra
+            open, high, low, close (numpy.ndarray): Preços de cada barra
+            volume (numpy.ndarray, opcional): Volume de cada barra
+            indicators (Dict[str, numpy.ndarray], opcional): Indicadores alinhados às barras
+        """
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.index = index
+        self.open = self._readonly(open)
+        self.high = self._readonly(high)
+        self.low = self._readonly(low)
+        self.close = self._readonly(close)
+        self.volume = self._readonly(volume) if volume is not None else None
+        self.indicators = {name: self._readonly(values) for name, values in (indicators or {}).items()}
+        self.version = self._fingerprint()
+        self._labels = None
+
+    @staticmethod
+    def _readonly(values) -> np.ndarray:
+        """Array float64 contíguo e protegido contra escrita"""
+        array = np.ascontiguousarray(values, dtype=np.float64)
+        array.setflags(write=False)
+        return array
+
+    def _fingerprint(self) -> str:
+        """Versão dos dados: muda sempre que qualquer barra muda"""
+        digest = hashlib.blake2b(digest_size=12)
+        digest.update(f"{self.symbol}|{self.timeframe}".encode())
+        digest.update(self.index.as_unit('ns').asi8.tobytes())
+        for values in (self.open, self.high, self.low, self.close):
+            digest.update(values.tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def from_dataframe(cls, symbol: str, timeframe: str, data: pd.DataFrame,
+                       indicators: Optional[pd.DataFrame] = None) -> "OHLCFrame":
+        """
+        Cria o frame a partir dos dados do ForexDataProvider, removendo fins de semana
+
+        Args:
+            symbol (str): Par de moedas ou ativo B3
+            timeframe (str): Intervalo de tempo das barras
+            data (pandas.DataFrame): Barras OHLC indexadas por horário
+            indicators (pandas.DataFrame, opcional): Indicadores alinhados a data
+
+        Returns:
+            OHLCFrame: Barras de dias úteis (segunda a sexta)
+        """
+        # Remove fins de semana (sábado=5, domingo=6) uma única vez para todas as visualizações
+        weekdays = np.asarray(data.index.weekday < 5)
+        index = data.index[weekdays]
+
+        def column(name):
+            return data[name].to_numpy(dtype=np.float64)[weekdays]
+
+        return cls(
+            symbol,
+            timeframe,
+            index,
+            column('open'),
+            column('high'),
+            column('low'),
+            column('close'),
+            volume=column('volume') if 'volume' in data.columns else None,
+            indicators=(
+                {name: indicators[name].to_numpy(dtype=np.float64)[weekdays] for name in indicators.columns}
+                if indicators is not None else None
+            )
+        )
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def empty(self) -> bool:
+        """Indica se o frame não tem barras"""
+        return len(self.index) == 0
+
+    @property
+    def intraday(self) -> bool:
+        """Indica se as barras são intradiárias (timeframes em horas)"""
+        return self.timeframe.endswith('h')
+
+    @property
+    def time_labels(self) -> np.ndarray:
+        """Horário de cada barra formatado para exibição (calculado uma vez)"""
+        if self._labels is None:
+            time_format = "%Y-%m-%d %H:%M" if self.intraday else "%Y-%m-%d"
+            self._labels = np.asarray(self.index.strftime(time_format), dtype=object)
+        return self._labels
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Converte o frame de volta para um DataFrame indexado por horário"""
+        columns = {'open': self.open, 'high': self.high, 'low': self.low, 'close': self.close}
+        if self.volume is not None:
+            columns['volume'] = self.volume
+        return pd.DataFrame(columns, index=self.index)
@@ -0,0 +1,109 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .backends import MarketDataBackend
+
+
+class QuoteService:
+    """Atualiza em segundo plano os últimos preços de todos os ativos em uma tabela em memória"""
+
+    def __init__(self, backend: MarketDataBackend, symbols: Dict[str, str], refresh_interval: float = 15.0):
+        """
+        Inicializa o serviço de cotações
+
+        Args:
+            backend (MarketDataBackend): Fonte de dados de mercado
+            symbols (Dict[str, str]): Ativos monitorados (símbolo -> símbolo na fonte)
+            refresh_interval (float): Intervalo entre atualizações em segundos
+        """
+        self.backend = backend
+        self.refresh_interval = refresh_interval
+
+        # Tabela compacta: uma posição por ativo, com preço e horário da atualização
+        self._slots = {symbol: i for i, symbol in enumerate(symbols)}
+        self._source_symbols = list(symbols.values())
+        self._prices = np.full(len(symbols), np.nan)
+        self._updated_at = np.full(len(symbols), np.nan)
+        self._lock = threading.Lock()
+
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        """Indica se a atualização em segundo plano está ativa"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def refresh(self):
+        """Atualiza todas as cotações com uma única consulta à fonte de dados"""
+        prices = self.backend.get_last_prices(self._source_symbols)
+        now = time.time()
+
+        with self._lock:
+            for i, source_symbol in enumerate(self._source_symbols):
+                price = prices.get(source_symbol)
+                if price is not None:
+                    self._prices[i] = price
+                    self._updated_at[i] = now
+
+    def _run(self):
+        """Laço da thread de atualização"""
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Erro ao atualizar cotações: {e}")
+            self._stop.wait(self.refresh_interval)
+
+    def start(self):
+        """Inicia a atualização periódica em segundo plano"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="quote-service", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Interrompe a atualização periódica"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.refresh_interval)
+            self._thread = None
+
+    def get(self, symbol: str) -> Optional[Tuple[float, float]]:
+        """
+        Lê a última cotação de um ativo
+
+        Args:
+            symbol (str): Par de moedas (ex: 'EURUSD') ou ativo B3 (ex: 'WINFUT')
+
+        Returns:
+            tuple: (preço, idade da cotação em segundos) ou None se não houver cotação
+        """
+        slot = self._slots.get(symbol.replace('=X', ''))
+        if slot is None:
+            return None
+
+        with self._lock:
+            price = self._prices[slot]
+            updated_at = self._updated_at[slot]
+
+        if np.isnan(price):
+            return None
+        return float(price), time.time() - float(updated_at)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Retorna todas as cotações disponíveis com a idade de cada uma"""
+        now = time.time()
+        with self._lock:
+            prices = self._prices.copy()
+            updated_at = self._updated_at.copy()
+
+        return {
+            symbol: {"price": float(prices[slot]), "age_seconds": now - float(updated_at[slot])}
+            for symbol, slot in self._slots.items()
+            if not np.isnan(prices[slot])
+        }
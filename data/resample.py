@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+
+# Sessões de negociação usadas para ancorar as barras agregadas
+#   tz: fuso horário da sessão
+#   anchor: hora em que o dia de negociação começa (e a partir da qual as barras são contadas)
+#   open/close: horário de pregão (None = mercado contínuo)
+SESSIONS = {
+    # O dia do Forex vira às 17:00 de Nova York
+    'fx': {'tz': 'America/New_York', 'anchor': 17, 'open': None, 'close': None},
+    # Pregão da B3: 9h às 18h (BRT)
+    'b3': {'tz': 'America/Sao_Paulo', 'anchor': 9, 'open': 9, 'close': 18}
+}
+
+# Timeframes suportados: (intervalo base obtido da fonte, regra de agregação local)
+TIMEFRAMES = {
+    '1h': ('1h', None),
+    '2h': ('1h', '2h'),
+    '4h': ('1h', '4h'),
+    '1d': ('1d', None),
+    '1wk': ('1d', '1wk')
+}
+
+_HOUR_NS = 3600 * 10**9
+_DAY_NS = 24 * _HOUR_NS
+
+
+def _bucket_labels(local_ns: np.ndarray, rule: str, anchor_hour: int) -> np.ndarray:
+    """Calcula o horário de início (em ns, no horário local da sessão) do bucket de cada barra"""
+    if rule == '1wk':
+        # Semanas começando na segunda-feira
+        days = local_ns // _DAY_NS
+        weekday = (days + 3) % 7  # 1970-01-01 foi uma quinta-feira
+        return (days - weekday) * _DAY_NS
+
+    if rule.endswith('h'):
+        step = int(rule[:-1]) * _HOUR_NS
+    elif rule.endswith('d'):
+        step = int(rule[:-1]) * _DAY_NS
+    else:
+        raise ValueError(f"Regra de agregação {rule} não suportada")
+
+    # Conta os buckets a partir da hora de início do dia de negociação
+    anchor = anchor_hour * _HOUR_NS
+    return (local_ns - anchor) // step * step + anchor
+
+
+def resample_ohlc(data: pd.DataFrame, rule: str, session: str = 'fx') -> pd.DataFrame:
+    """
+    Agrega barras OHLCV em um timeframe maior, respeitando a sessão de negociação
+
+    Os buckets são alinhados ao início do dia de negociação (17:00 de Nova York
+    no Forex, abertura do pregão na B3) e, para a B3, barras fora do horário de
+    pregão são descartadas. A agregação é vetorizada: os dados devem estar
+    ordenados por horário.
+
+    Args:
+        data (pandas.DataFrame): Barras com colunas open/high/low/close[/volume]
+        rule (str): Timeframe de destino ('2h', '4h', '1d', '1wk', ...)
+        session (str): Sessão de negociação ('fx' ou 'b3')
+
+    Returns:
+        pandas.DataFrame: Barras agregadas, indexadas pelo início de cada bucket
+    """
+    if data.empty:
+        return data
+
+    session_info = SESSIONS[session]
+    index = data.index
+    original_tz = index.tz
+    if original_tz is not None:
+        index = index.tz_convert(session_info['tz'])
+
+    # Descarta barras fora do horário de pregão
+    if original_tz is not None and session_info['open'] is not None:
+        in_session = (index.hour >= session_info['open']) & (index.hour < session_info['close'])
+        data = data[in_session]
+        index = index[in_session]
+        if data.empty:
+            return data
+
+    # Horário local da sessão em ns e deslocamento em relação ao UTC de cada barra
+    if original_tz is not None:
+        utc_ns = index.as_unit('ns').asi8
+        local_ns = index.tz_localize(None).as_unit('ns').asi8
+        offset_ns = local_ns - utc_ns
+        anchor_hour = session_info['anchor']
+    else:
+        # Barras diárias sem fuso já estão datadas pelo dia de negociação
+        local_ns = index.as_unit('ns').asi8
+        offset_ns = np.zeros(len(local_ns), dtype=np.int64)
+        anchor_hour = 0
+
+    labels = _bucket_labels(local_ns, rule, anchor_hour)
+
+    # Início de cada bucket (os dados estão ordenados, então buckets são contíguos)
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], len(labels)] - 1
+
+    result = {
+        'open': data['open'].to_numpy(dtype=np.float64)[starts],
+        'high': np.fmax.reduceat(data['high'].to_numpy(dtype=np.float64), starts),
+        'low': np.fmin.reduceat(data['low'].to_numpy(dtype=np.float64), starts),
+        'close': data['close'].to_numpy(dtype=np.float64)[ends]
+    }
+    if 'volume' in data.columns:
+        result['volume'] = np.add.reduceat(np.nan_to_num(data['volume'].to_numpy(dtype=np.float64)), starts)
+
+    # Converte o início dos buckets de volta usando o deslocamento da primeira barra
+    # (evita ambiguidades nas mudanças de horário de verão)
+    bucket_ns = labels[starts] - offset_ns[starts]
+    new_index = pd.DatetimeIndex(bucket_ns.astype('datetime64[ns]'), name=data.index.name)
+    if original_tz is not None:
+        new_index = new_index.tz_localize('UTC').tz_convert(original_tz)
+
+    return pd.DataFrame(result, index=new_index)
+
+
+def _group_bounds(n: int, max_groups: int):
+    """Início e fim de max_groups grupos contíguos de tamanho quase igual sobre n barras"""
+    group = np.arange(n) * max_groups // n
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return starts, ends
+
+
+def downsample_ohlc_arrays(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                           max_bars: int):
+    """
+    Versão em arrays de downsample_ohlc
+
+    Args:
+        open_, high, low, close (numpy.ndarray): Preços das barras, ordenadas por horário
+        max_bars (int): Número máximo de barras no resultado
+
+    Returns:
+        tuple: (posição da primeira barra de cada grupo, dicionário com os arrays
+            'open', 'high', 'low' e 'close' agregados)
+    """
+    n = len(close)
+    if max_bars <= 0 or n <= max_bars:
+        return np.arange(n), {'open': open_, 'high': high, 'low': low, 'close': close}
+
+    starts, ends = _group_bounds(n, max_bars)
+    return starts, {
+        'open': open_[starts],
+        'high': np.fmax.reduceat(high, starts),
+        'low': np.fmin.reduceat(low, starts),
+        'close': close[ends]
+    }
+
+
+def downsample_ohlc(data: pd.DataFrame, max_bars: int) -> pd.DataFrame:
+    """
+    Reduz o número de barras unindo barras vizinhas em candles maiores
+
+    As máximas e mínimas verdadeiras são preservadas: cada candle resultante
+    abre na abertura da primeira barra do grupo, fecha no fechamento da última
+    e tem a maior máxima e a menor mínima do grupo.
+
+    Args:
+        data (pandas.DataFrame): Barras com colunas open/high/low/close[/volume], ordenadas
+        max_bars (int): Número máximo de barras no resultado
+
+    Returns:
+        pandas.DataFrame: Barras agregadas, indexadas pelo horário da primeira barra de cada grupo
+    """
+    n = len(data)
+    if max_bars <= 0 or n <= max_bars:
+        return data
+
+    starts, result = downsample_ohlc_arrays(
+        data['open'].to_numpy(dtype=np.float64),
+        data['high'].to_numpy(dtype=np.float64),
+        data['low'].to_numpy(dtype=np.float64),
+        data['close'].to_numpy(dtype=np.float64),
+        max_bars
+    )
+    if 'volume' in data.columns:
+        result['volume'] = np.add.reduceat(np.nan_to_num(data['volume'].to_numpy(dtype=np.float64)), starts)
+
+    return pd.DataFrame(result, index=data.index[starts])
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Seleciona os pontos de uma linha pelo algoritmo Largest-Triangle-Three-Buckets
+
+    O primeiro e o último ponto são mantidos; os demais são divididos em
+    max_points - 2 grupos e, de cada grupo, fica o ponto que forma o maior
+    triângulo com o ponto escolhido no grupo anterior e a média do grupo
+    seguinte. Picos e vales visíveis da série são preservados.
+
+    Args:
+        x (numpy.ndarray): Coordenadas x (ex: horários em ms), crescentes
+        y (numpy.ndarray): Valores da série, sem NaN
+        max_points (int): Número máximo de pontos no resultado
+
+    Returns:
+        numpy.ndarray: Posições dos pontos selecionados, em ordem crescente
+    """
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64) - float(x[0])
+    y = np.asarray(y, dtype=np.float64)
+
+    # Grupos internos [edges[i], edges[i + 1]) entre o primeiro e o último ponto
+    edges = _group_bounds(n - 2, max_points - 2)[0] + 1
+    bounds = np.r_[edges, n - 1]
+
+    # Média de cada grupo (o "ponto c" do grupo anterior); o último ponto fecha a série
+    counts = np.diff(bounds)
+    mean_x = np.r_[np.add.reduceat(x[1:n - 1], edges - 1) / counts, x[-1]]
+    mean_y = np.r_[np.add.reduceat(y[1:n - 1], edges - 1) / counts, y[-1]]
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        ax, ay = x[a], y[a]
+        # Dobro da área do triângulo (a, b, média do grupo seguinte) para cada b do grupo
+        area = np.abs((ax - mean_x[i + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (mean_y[i + 1] - ay))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
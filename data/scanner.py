@@ -0,0 +1,262 @@
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Dias de histórico consultados por timeframe (o suficiente para janelas de ~60 barras)
+SCAN_DAYS = {
+    '1h': 5,
+    '2h': 10,
+    '4h': 20,
+    '1d': 30,
+    '1wk': 140
+}
+
+
+def align_prices(series: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, List[str], Dict[str, np.ndarray]]:
+    """
+    Alinha as barras de vários símbolos em uma linha do tempo comum
+
+    Args:
+        series (Dict[str, tuple]): Por símbolo, (horários em ns, matriz n x 3 com
+            close/high/low). Símbolos sem barras são ignorados
+
+    Returns:
+        tuple: (horários em ns, símbolos, matrizes T x N de 'close' (preenchida com o
+            último preço conhecido), 'high', 'low' e 'present' (se o símbolo teve barra))
+    """
+    symbols = [symbol for symbol, (index, _) in series.items() if len(index)]
+    indexes = [series[symbol][0] for symbol in symbols]
+    times = np.unique(np.concatenate(indexes)) if indexes else np.empty(0, dtype=np.int64)
+
+    shape = (len(times), len(symbols))
+    close = np.full(shape, np.nan)
+    high = np.full(shape, np.nan)
+    low = np.full(shape, np.nan)
+    for column, (symbol, index) in enumerate(zip(symbols, indexes)):
+        rows = np.searchsorted(times, index)
+        values = series[symbol][1]
+        close[rows, column] = values[:, 0]
+        high[rows, column] = values[:, 1]
+        low[rows, column] = values[:, 2]
+
+    # Preenche horários sem barra com o último fechamento conhecido (ex: B3 fora do pregão)
+    present = ~np.isnan(close)
+    last_row = np.where(present, np.arange(len(times))[:, None], 0)
+    np.maximum.accumulate(last_row, axis=0, out=last_row)
+    close = close[last_row, np.arange(len(symbols))]
+
+    return times, symbols, {'close': close, 'high': high, 'low': low, 'present': present}
+
+
+class RollingCorrelation:
+    """
+    Matriz de correlação dos retornos em uma janela deslizante, atualizada incrementalmente
+
+    Mantém as somas (Σx, Σx², Σxy) das linhas de retornos confirmadas na janela;
+    cada nova barra soma sua contribuição e subtrai a da barra que saiu da janela,
+    em vez de recalcular a matriz inteira. A última barra é provisória (candle em
+    formação) e entra apenas no resultado, não nas somas.
+    """
+
+    def __init__(self, window: int, rebuild_every: Optional[int] = None):
+        """
+        Inicializa a janela de correlação
+
+        Args:
+            window (int): Número de retornos na janela
+            rebuild_every (int, opcional): Número de barras incrementais após o qual
+                as somas são recalculadas do zero (limita o erro acumulado)
+        """
+        self.window = window
+        self.rebuild_every = rebuild_every or window * 10
+        self.full_rebuilds = 0
+        self.incremental_updates = 0
+        self._symbols = None
+        self._committed_time = None
+        self._since_rebuild = 0
+        self._lock = threading.Lock()
+
+    def _rebuild(self, rows: np.ndarray):
+        """Recalcula as somas a partir das linhas confirmadas"""
+        self._rows = rows[-(self.window - 1):] if self.window > 1 else rows[:0]
+        self._sum = self._rows.sum(axis=0)
+        self._sum_sq = (self._rows ** 2).sum(axis=0)
+        self._sum_xy = self._rows.T @ self._rows
+        self._since_rebuild = 0
+        self.full_rebuilds += 1
+
+    def _append(self, rows: np.ndarray):
+        """Acrescenta linhas confirmadas e remove as que saíram da janela"""
+        combined = np.vstack([self._rows, rows])
+        keep = self.window - 1
+        leaving = combined[:-keep] if keep > 0 else combined
+        self._rows = combined[-keep:] if keep > 0 else combined[:0]
+
+        self._sum += rows.sum(axis=0) - leaving.sum(axis=0)
+        self._sum_sq += (rows ** 2).sum(axis=0) - (leaving ** 2).sum(axis=0)
+        self._sum_xy += rows.T @ rows - leaving.T @ leaving
+        self._since_rebuild += len(rows)
+        self.incremental_updates += 1
+
+    def update(self, times: np.ndarray, symbols: List[str], returns: np.ndarray) -> np.ndarray:
+        """
+        Calcula a matriz de correlação na janela que termina na última barra
+
+        Args:
+            times (numpy.ndarray): Horários das linhas de retornos (ns, ordenados)
+            symbols (List[str]): Símbolos das colunas
+            returns (numpy.ndarray): Retornos T x N (sem NaN)
+
+        Returns:
+            numpy.ndarray: Matriz N x N (NaN para símbolos sem variação na janela)
+        """
+        with self._lock:
+            committed_time = self._committed_time
+            position = int(np.searchsorted(times, committed_time)) if committed_time is not None else -1
+
+            reusable = (
+                self._symbols == symbols
+                and 0 <= position < len(times) - 1
+                and times[position] == committed_time
+                and self._since_rebuild < self.rebuild_every
+            )
+            if reusable:
+                new_rows = returns[position + 1:-1]
+                if len(new_rows):
+                    self._append(new_rows)
+            else:
+                self._symbols = list(symbols)
+                self._rebuild(returns[:-1])
+            self._committed_time = times[-2] if len(times) >= 2 else None
+
+            # Resultado: somas confirmadas + barra provisória
+            last = returns[-1]
+            n = len(self._rows) + 1
+            total = self._sum + last
+            total_sq = self._sum_sq + last ** 2
+            total_xy = self._sum_xy + np.outer(last, last)
+
+        variance = n * total_sq - total ** 2
+        covariance = n * total_xy - np.outer(total, total)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.sqrt(np.outer(variance, variance))
+            correlation = np.where(scale > 1e-18, covariance / scale, np.nan)
+        return np.clip(correlation, -1.0, 1.0)
+
+
+class MarketScanner:
+    """Calcula métricas e correlações de todos os ativos em uma única passagem vetorizada"""
+
+    def __init__(self, data_provider):
+        """
+        Inicializa o scanner
+
+        Args:
+            data_provider (ForexDataProvider): Provedor dos dados OHLC
+        """
+        self.data_provider = data_provider
+        self._correlations = {}
+        self._correlations_guard = threading.Lock()
+        
+        # Arrays extraídos de cada DataFrame, reaproveitados enquanto o provedor
+        # devolver o mesmo objeto (cache em memória ainda válido)
+        self._arrays = {}
+
+    def _series_arrays(self, symbol: str, timeframe: str, frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Horários (ns) e matriz close/high/low de um símbolo"""
+        cached = self._arrays.get((symbol, timeframe))
+        if cached is not None and cached[0] is frame:
+            return cached[1]
+
+        if frame.empty:
+            arrays = (np.empty(0, dtype=np.int64), np.empty((0, 3)))
+        else:
+            arrays = (frame.index.as_unit('ns').asi8, frame[['close', 'high', 'low']].to_numpy(dtype=np.float64))
+        self._arrays[(symbol, timeframe)] = (frame, arrays)
+        return arrays
+
+    def _correlation_for(self, timeframe: str, window: int) -> RollingCorrelation:
+        """Janela de correlação persistente de um timeframe"""
+        with self._correlations_guard:
+            correlation = self._correlations.get((timeframe, window))
+            if correlation is None:
+                correlation = self._correlations[(timeframe, window)] = RollingCorrelation(window)
+            return correlation
+
+    def scan(self, symbols: Optional[List[str]] = None, timeframe: str = '1d', window: int = 20) -> Dict[str, Any]:
+        """
+        Calcula retorno, volatilidade, posição no range e correlação de vários ativos
+
+        Args:
+            symbols (List[str], opcional): Ativos a analisar. Se não informado, usa
+                todos os pares Forex e os ativos B3
+            timeframe (str): Intervalo de tempo ('1h', '2h', '4h', '1d', '1wk')
+            window (int): Número de barras das métricas e da correlação
+
+        Returns:
+            Dict: Métricas por ativo e matriz de correlação dos retornos
+        """
+        provider = self.data_provider
+        if symbols is None:
+            symbols = provider.get_available_pairs() + provider.b3_assets
+
+        # Uma única consulta em lote para todos os ativos
+        data = provider.get_ohlc_data_many(symbols, timeframe, SCAN_DAYS.get(timeframe, SCAN_DAYS['1d']))
+        times, scanned, prices = align_prices({
+            symbol: self._series_arrays(symbol, timeframe, frame) for symbol, frame in data.items()
+        })
+        missing = [symbol for symbol in symbols if symbol not in scanned]
+
+        if len(times) < 2:
+            return {"error": "Não há dados suficientes para o scanner", "missing": missing}
+
+        close = prices['close']
+        window = max(2, min(window, len(times) - 1))
+
+        # Retornos logarítmicos; antes da primeira barra de um ativo, retorno zero
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.diff(np.log(close), axis=0, prepend=np.log(close[:1]))
+        returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+        recent = returns[-window:]
+        high = np.nanmax(prices['high'][-window:], axis=0)
+        low = np.nanmin(prices['low'][-window:], axis=0)
+        last = close[-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change_pct = (last / close[-2] - 1) * 100
+            return_pct = (last / close[-1 - window] - 1) * 100
+            range_position = (last - low) / (high - low) * 100
+        volatility_pct = recent.std(axis=0) * 100
+        bars = prices['present'].sum(axis=0)
+
+        correlation = self._correlation_for(timeframe, window).update(times, scanned, returns)
+
+        def clean(value, digits):
+            return None if not np.isfinite(value) else round(float(value), digits)
+
+        metrics = [
+            {
+                "symbol": symbol,
+                "last": clean(last[i], 5),
+                "change_pct": clean(change_pct[i], 3),
+                "return_pct": clean(return_pct[i], 3),
+                "volatility_pct": clean(volatility_pct[i], 3),
+                "range_position": clean(range_position[i], 1),
+                "bars": int(bars[i])
+            }
+            for i, symbol in enumerate(scanned)
+        ]
+
+        return {
+            "timeframe": timeframe,
+            "window": window,
+            "as_of": str(max(data[symbol].index[-1] for symbol in scanned)),
+            "metrics": metrics,
+            "correlation": {
+                "symbols": scanned,
+                "matrix": np.where(np.isfinite(correlation), np.round(correlation, 3), None).tolist()
+            },
+            "missing": missing
+        }
@@ -0,0 +1,120 @@
+from datetime import date
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ohlc_frame import OHLCFrame
+
+# Horizontes do resumo: (nome, número de pregões; None = desde o início do ano)
+SUMMARY_WINDOWS = (
+    ('1d', 1),
+    ('5d', 5),
+    ('20d', 20),
+    ('ytd', None)
+)
+
+# Pregões por ano, usados para anualizar a volatilidade realizada de barras diárias
+TRADING_DAYS_PER_YEAR = 252
+
+
+def summary_history_days(today: Optional[date] = None) -> int:
+    """
+    Dias de histórico diário necessários para todos os horizontes do resumo
+
+    Args:
+        today (date, opcional): Data de referência (padrão: hoje)
+
+    Returns:
+        int: Dias corridos desde o início do ano (com folga), nunca menos que o
+            necessário para 20 pregões e o fechamento anterior
+    """
+    today = today or date.today()
+    return max(40, (today - date(today.year, 1, 1)).days + 7)
+
+
+def _clean(value) -> Optional[float]:
+    """Converte para float, com None para valores ausentes"""
+    return float(value) if np.isfinite(value) else None
+
+
+def window_stats(frame: OHLCFrame, windows: Sequence[Tuple[str, Optional[int]]] = SUMMARY_WINDOWS,
+                 periods_per_year: int = TRADING_DAYS_PER_YEAR) -> Dict[str, Dict[str, Any]]:
+    """
+    Calcula variação, range, volatilidade realizada e ATR de vários horizontes em uma passagem
+
+    Todos os horizontes terminam na última barra; por isso cada métrica vem de
+    um único array de sufixos (máxima/mínima acumuladas e somas acumuladas de
+    retornos e true ranges, do fim para o início), lido na posição inicial de
+    cada horizonte.
+
+    Args:
+        frame (OHLCFrame): Barras diárias, em ordem cronológica
+        windows (Sequence): Horizontes (nome, número de barras; None = desde o início do ano)
+        periods_per_year (int): Barras por ano, para anualizar a volatilidade
+
+    Returns:
+        Dict[str, Dict]: Por horizonte, barras, variação (absoluta e %), máxima,
+            mínima, range (%), volatilidade realizada anualizada (%) e ATR
+    """
+    n = len(frame)
+    if n == 0:
+        return {}
+
+    open_, high, low, close = frame.open, frame.high, frame.low, frame.close
+    prev_close = np.r_[np.nan, close[:-1]]
+
+    # Sufixos: valor de cada métrica da barra i até a última
+    suffix_high = np.fmax.accumulate(high[::-1])[::-1]
+    suffix_low = np.fmin.accumulate(low[::-1])[::-1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.log(close / prev_close)
+    valid = np.isfinite(returns)
+    returns = np.where(valid, returns, 0.0)
+    suffix_count = np.cumsum(valid[::-1])[::-1]
+    suffix_sum = np.cumsum(returns[::-1])[::-1]
+    suffix_sum_sq = np.cumsum((returns ** 2)[::-1])[::-1]
+
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    true_range = np.nan_to_num(true_range)
+    suffix_tr = np.cumsum(true_range[::-1])[::-1]
+
+    # Posição inicial de cada horizonte
+    times = frame.index.as_unit('ns').asi8
+    year_start = np.datetime64(f"{frame.index[-1].year}-01-01", 'ns').astype(np.int64)
+    starts = np.array([
+        max(0, n - bars) if bars is not None else int(np.searchsorted(times, year_start))
+        for _, bars in windows
+    ])
+    starts = np.minimum(starts, n - 1)
+
+    # Referência da variação: fechamento anterior ao horizonte (ou abertura da primeira barra)
+    reference = np.where(starts > 0, close[np.maximum(starts - 1, 0)], open_[starts])
+    last = close[-1]
+    bars = n - starts
+    count = suffix_count[starts]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = last - reference
+        change_pct = change / reference * 100
+        window_high = suffix_high[starts]
+        window_low = suffix_low[starts]
+        range_pct = (window_high - window_low) / reference * 100
+        mean = suffix_sum[starts] / count
+        variance = (suffix_sum_sq[starts] - count * mean ** 2) / (count - 1)
+        volatility_pct = np.where(count >= 2, np.sqrt(np.maximum(variance, 0.0) * periods_per_year) * 100, np.nan)
+        atr = suffix_tr[starts] / bars
+
+    return {
+        name: {
+            "bars": int(bars[i]),
+            "start": frame.index[starts[i]],
+            "change": _clean(change[i]),
+            "change_pct": _clean(change_pct[i]),
+            "high": _clean(window_high[i]),
+            "low": _clean(window_low[i]),
+            "range_pct": _clean(range_pct[i]),
+            "volatility_pct": _clean(volatility_pct[i]),
+            "atr": _clean(atr[i])
+        }
+        for i, (name, _) in enumerate(windows)
+    }
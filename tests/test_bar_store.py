@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from data.backends import MarketDataBackend
+from data.bar_store import BarStore
+from data.forex_data import ForexDataProvider
+
+
+class FlakyBackend(MarketDataBackend):
+    """Fonte com barras diárias sintéticas que pode falhar (resposta vazia) sob demanda"""
+
+    name = 'flaky'
+
+    def __init__(self):
+        self.fail = False
+        self.calls = []
+
+    def download(self, symbols, start_date, end_date, interval):
+        self.calls.append(start_date)
+        if self.fail:
+            return {symbol: pd.DataFrame() for symbol in symbols}
+
+        index = pd.date_range(pd.Timestamp(start_date).normalize(), end_date, freq='D', inclusive='left', name='Date')
+        values = np.arange(len(index), dtype=np.float64) + 1.0
+        data = pd.DataFrame(
+            {'open': values, 'high': values + 1, 'low': values - 1, 'close': values, 'volume': 0.0},
+            index=index
+        )
+        return {symbol: data for symbol in symbols}
+
+    def get_last_price(self, symbol):
+        return None
+
+
+def test_failed_head_download_is_retried(tmp_path):
+    backend = FlakyBackend()
+    store = BarStore(str(tmp_path))
+    provider = ForexDataProvider(bar_store=store, backend=backend)
+
+    # Período curto: a série passa a cobrir apenas os últimos dias
+    short = provider.get_ohlc_data('EURUSD', '1d', days_back=2)
+    _, _, covered_before = store.bounds('EURUSD', '1d')
+
+    # Período maior com a fonte falhando: o início pedido não é dado como consultado
+    backend.fail = True
+    provider.cache.clear()
+    failed = provider.get_ohlc_data('EURUSD', '1d', days_back=30)
+    assert len(failed) == len(store.read('EURUSD', '1d'))
+    assert store.bounds('EURUSD', '1d')[2] == covered_before
+
+    # Com a fonte de volta, o trecho pendente é baixado de novo
+    backend.fail = False
+    provider.cache.clear()
+    recovered = provider.get_ohlc_data('EURUSD', '1d', days_back=30)
+    _, _, covered_after = store.bounds('EURUSD', '1d')
+
+    assert len(recovered) > len(short)
+    assert covered_after < covered_before
+    assert recovered.index[0] - backend.calls[-1] < timedelta(days=1)
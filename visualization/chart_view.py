@@ -1,97 +1,213 @@
-import pandas as pd
-import plotly.graph_objects as go
-from typing import Dict, Any
+import json
+import os
+import numpy as np
+from typing import Dict, Any, Optional
+
+from data.cache import TTLCache
+from data.ohlc_frame import OHLCFrame
+from data.resample import downsample_ohlc_arrays, lttb_indices
 
 class ChartView:
     """Componente para visualização de gráficos de candlestick"""
     
+    # Sobreposições: médias móveis e Bandas de Bollinger (alinhadas às barras)
+    OVERLAYS = [
+        ("bb_upper", "Bollinger Sup.", dict(color="rgba(120, 120, 120, 0.6)", width=1, dash="dot")),
+        ("bb_lower", "Bollinger Inf.", dict(color="rgba(120, 120, 120, 0.6)", width=1, dash="dot")),
+        ("sma_20", "MM 20", dict(color="#0d6efd", width=1.5)),
+        ("sma_50", "MM 50", dict(color="#fd7e14", width=1.5))
+    ]
+    
     def __init__(self):
-        pass
+        # JSON do gráfico por versão dos dados e intervalo visível: a mesma chave sempre gera o mesmo JSON
+        self.chart_cache = TTLCache(maxsize=int(os.getenv("CHART_CACHE_SIZE", "64")))
+        
+        # Pontos por série enviados ao gráfico (da ordem da largura do gráfico em pixels)
+        self.max_points = int(os.getenv("CHART_MAX_POINTS", "1500"))
+    
+    def _visible_series(self, frame: OHLCFrame, start: Optional[int] = None, end: Optional[int] = None,
+                        max_points: Optional[int] = None, lines: bool = True) -> Dict[str, Any]:
+        """
+        Recorta o intervalo visível do frame e o reduz a no máximo max_points pontos por série
+        
+        Candles vizinhos são unidos preservando máximas e mínimas; as sobreposições
+        (linhas) são reduzidas com LTTB, que mantém picos e vales.
+        
+        Args:
+            frame (OHLCFrame): Barras e indicadores
+            start, end (int, opcional): Limites do intervalo visível (ms desde a época)
+            max_points (int, opcional): Pontos por série (padrão CHART_MAX_POINTS)
+            lines (bool): Se False, as sobreposições não são reduzidas com LTTB
+            
+        Returns:
+            Dict: Horários (ns) e preços dos candles, posição (no frame) da última
+                barra de cada candle, sobreposições com seus próprios horários,
+                número de barras visíveis e barras por candle
+        """
+        max_points = max_points or self.max_points
+        times = frame.index.as_unit('ns').asi8
+        lo = int(np.searchsorted(times, start * 1_000_000, side='left')) if start is not None else 0
+        hi = int(np.searchsorted(times, end * 1_000_000, side='right')) if end is not None else len(times)
+        visible = times[lo:hi]
+        
+        starts, candles = downsample_ohlc_arrays(
+            frame.open[lo:hi], frame.high[lo:hi], frame.low[lo:hi], frame.close[lo:hi], max_points
+        )
+        
+        downsampled = len(visible) > max_points
+        
+        overlays = []
+        for column, name, line in (self.OVERLAYS if lines else []):
+            values = frame.indicators.get(column)
+            if values is None:
+                continue
+            values = values[lo:hi]
+            finite = np.flatnonzero(~np.isnan(values))
+            if not len(finite):
+                continue
+            if downsampled:
+                finite = finite[lttb_indices(visible[finite] // 1_000_000, values[finite], max_points)]
+                overlays.append((column, name, line, visible[finite], values[finite]))
+            else:
+                overlays.append((column, name, line, visible, values))
+        
+        return {
+            "downsampled": downsampled,
+            "time": visible[starts],
+            "ends": lo + np.r_[starts[1:], len(visible)] - 1 if len(starts) else starts,
+            "open": candles['open'],
+            "high": candles['high'],
+            "low": candles['low'],
+            "close": candles['close'],
+            "overlays": overlays,
+            "bars": len(visible),
+            "bars_per_point": round(len(visible) / len(starts), 1) if len(starts) else 1.0
+        }
     
-    def create_candlestick_chart(self, data: Dict[str, Any]) -> go.Figure:
+    @staticmethod
+    def _column(values: np.ndarray) -> list:
+        """Valores arredondados a 5 casas decimais, com NaN convertido em null"""
+        rounded = np.round(values, 5)
+        if np.isnan(rounded).any():
+            return np.where(np.isnan(rounded), None, rounded).tolist()
+        return rounded.tolist()
+    
+    def get_chart_payload(self, data: Dict[str, Any], start: Optional[int] = None, end: Optional[int] = None,
+                          max_points: Optional[int] = None) -> Dict[str, Any]:
         """
-        Cria um gráfico de candlestick a partir dos dados OHLC
+        Monta os dados do gráfico em formato colunar, para o candlestick ser desenhado no navegador
+        
+        Com muitas barras no intervalo, candles vizinhos são unidos (ver
+        _visible_series); ao aproximar o gráfico, o navegador pede apenas o
+        intervalo visível e recebe o detalhe correspondente.
         
         Args:
             data (Dict): Dados OHLC obtidos do agente Forex
+            start, end (int, opcional): Limites do intervalo visível (ms desde a época)
+            max_points (int, opcional): Pontos por série (padrão CHART_MAX_POINTS)
             
         Returns:
-            go.Figure: Figura do gráfico de candlestick
+            Dict: Horários (ms desde a época), arrays OHLC, sobreposições com nome e
+                estilo, e o intervalo completo disponível
         """
         if "error" in data:
-            # Retorna uma figura vazia em caso de erro
-            fig = go.Figure()
-            fig.add_annotation(
-                text=f"Erro: {data['error']}",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5,
-                showarrow=False
-            )
-            return fig
-        
-        # Converte os dados para DataFrame
-        df = pd.DataFrame(data["data"])
-        
-        if df.empty:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="Não há dados disponíveis",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5,
-                showarrow=False
-            )
-            return fig
-        
-        # Identifica a coluna de data/hora
-        date_column = "Datetime" if "Datetime" in df.columns else "Date"
-        
-        # Converte para datetime se necessário
-        if date_column in df.columns:
-            df[date_column] = pd.to_datetime(df[date_column])
+            return {"error": data["error"]}
+        
+        frame = data["frame"]
+        if frame.empty:
+            return {"error": "Não há dados disponíveis"}
+        
+        series = self._visible_series(frame, start, end, max_points)
+        
+        overlays = []
+        for column, name, line, times, values in series["overlays"]:
+            overlay = {"key": column, "name": name, "line": line, "values": self._column(values)}
+            if series["downsampled"]:
+                # Pontos escolhidos pelo LTTB: cada linha tem seus próprios horários
+                overlay["time"] = (times // 1_000_000).tolist()
+            overlays.append(overlay)
+        
+        times = frame.index.as_unit('ns').asi8
+        return {
+            "symbol": data["symbol"],
+            "timeframe": data["timeframe"],
+            "version": frame.version,
+            "range": {"start": int(times[0] // 1_000_000), "end": int(times[-1] // 1_000_000)},
+            "bars": series["bars"],
+            "bars_per_point": series["bars_per_point"],
+            "time": (series["time"] // 1_000_000).tolist(),
+            "open": self._column(series["open"]),
+            "high": self._column(series["high"]),
+            "low": self._column(series["low"]),
+            "close": self._column(series["close"]),
+            "overlays": overlays
+        }
+    
+    def get_chart_columns(self, data: Dict[str, Any], start: Optional[int] = None, end: Optional[int] = None,
+                          max_points: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Monta os dados do gráfico como colunas de mesmo tamanho (para formatos binários, ex: Arrow)
+        
+        Em vez dos pontos escolhidos pelo LTTB, cada sobreposição traz o valor na
+        última barra de cada candle, alinhado às colunas OHLC.
+        
+        Args:
+            data (Dict): Dados OHLC obtidos do agente Forex
+            start, end, max_points: Ver get_chart_payload
             
-            # Remove fins de semana (sábado=5, domingo=6)
-            # Mantém apenas dias úteis (segunda=0 até sexta=4)
-            df = df[df[date_column].dt.weekday < 5]
-        
-        # Cria o gráfico de candlestick
-        fig = go.Figure(data=[go.Candlestick(
-            x=df[date_column],
-            open=df['open'],
-            high=df['high'],
-            low=df['low'],
-            close=df['close'],
-            name=data["symbol"]
-        )])
-        
-        # Configura o layout do gráfico
-        fig.update_layout(
-            title=f"{data['symbol']} - {data['timeframe']}",
-            xaxis_title="Data/Hora",
-            yaxis_title="Preço",
-            xaxis_rangeslider_visible=False,
-            template="plotly_white"
-        )
+        Returns:
+            Dict: 'columns' (arrays NumPy por nome, com 'time' em datetime64) e
+                'metadata' (símbolo, timeframe, versão e barras por candle)
+        """
+        if "error" in data:
+            return {"error": data["error"]}
+        
+        frame = data["frame"]
+        if frame.empty:
+            return {"error": "Não há dados disponíveis"}
         
-        return fig
+        series = self._visible_series(frame, start, end, max_points, lines=False)
+        columns = {
+            "time": series["time"].astype('datetime64[ns]'),
+            "open": series["open"],
+            "high": series["high"],
+            "low": series["low"],
+            "close": series["close"]
+        }
+        for column, _, _ in self.OVERLAYS:
+            values = frame.indicators.get(column)
+            if values is not None:
+                columns[column] = values[series["ends"]]
+        
+        return {
+            "columns": columns,
+            "metadata": {
+                "symbol": data["symbol"],
+                "timeframe": data["timeframe"],
+                "version": frame.version,
+                "bars": str(series["bars"]),
+                "bars_per_point": str(series["bars_per_point"])
+            }
+        }
     
-    def get_html_chart(self, data: Dict[str, Any]) -> str:
+    def get_chart_json(self, data: Dict[str, Any], start: Optional[int] = None, end: Optional[int] = None,
+                       max_points: Optional[int] = None) -> bytes:
         """
-        Gera o HTML do gráfico de candlestick
+        Serializa os dados do gráfico em JSON, reaproveitando o resultado por versão dos dados e intervalo
         
         Args:
             data (Dict): Dados OHLC obtidos do agente Forex
+            start, end (int, opcional): Limites do intervalo visível (ms desde a época)
+            max_points (int, opcional): Pontos por série (padrão CHART_MAX_POINTS)
             
         Returns:
-            str: HTML do gráfico
+            bytes: JSON compacto (ver get_chart_payload)
         """
-        fig = self.create_candlestick_chart(data)
+        def build():
+            return json.dumps(self.get_chart_payload(data, start, end, max_points), separators=(',', ':')).encode()
         
-        # Converte a figura para HTML
-        html = fig.to_html(
-            full_html=False,
-            include_plotlyjs='cdn',
-            config={'responsive': True}
-        )
+        if "error" in data or data["frame"].empty:
+            return build()
         
-        return html
-        
\ No newline at end of file
+        key = (data["frame"].version, start, end, max_points or self.max_points)
+        return self.chart_cache.get_or_load(key, build, ttl=None)
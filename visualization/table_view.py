@@ -1,95 +1,130 @@
-import pandas as pd
-from typing import Dict, List, Any
+import os
+import numpy as np
+from typing import Dict, Any
+
+from data.cache import TTLCache
+from data.indicators import latest_values
+from data.ohlc_frame import OHLCFrame
 
 class TableView:
     """Componente para visualização tabular de dados OHLC"""
     
+    # Colunas ordenáveis da tabela paginada (a coluna 'time' é o horário da barra)
+    SORT_COLUMNS = ("time", "open", "high", "low", "close", "volume")
+    
     def __init__(self):
-        pass
+        # Ordenação de cada coluna por versão dos dados: calculada uma vez, reaproveitada em todas as páginas
+        self.sort_cache = TTLCache(maxsize=int(os.getenv("TABLE_CACHE_SIZE", "64")))
     
-    def format_ohlc_data(self, data: Dict[str, Any]) -> pd.DataFrame:
+    def _sort_order(self, frame: OHLCFrame, sort: str, order: str) -> np.ndarray:
+        """Posições das barras na ordem pedida (valores ausentes sempre no final)"""
+        def build():
+            if sort == "time":
+                # As barras já estão em ordem cronológica
+                positions = np.arange(len(frame))
+                return positions if order == "asc" else positions[::-1].copy()
+            values = getattr(frame, sort)
+            return np.argsort(values if order == "asc" else -values, kind="stable")
+        
+        return self.sort_cache.get_or_load((frame.version, sort, order), build, ttl=None)
+    
+    def get_table_page(self, data: Dict[str, Any], offset: int = 0, limit: int = 100,
+                       sort: str = "time", order: str = "asc") -> Dict[str, Any]:
         """
-        Formata os dados OHLC para exibição em tabela
+        Retorna uma página da tabela OHLC, ordenada no servidor
+        
+        Apenas as linhas da página são formatadas e serializadas; a ordenação de
+        cada coluna é calculada uma vez por versão dos dados. O tempo de resposta
+        não depende do tamanho do histórico.
         
         Args:
             data (Dict): Dados OHLC obtidos do agente Forex
+            offset (int): Posição da primeira linha na ordem pedida
+            limit (int): Número máximo de linhas
+            sort (str): Coluna de ordenação ('time', 'open', 'high', 'low', 'close', 'volume')
+            order (str): 'asc' ou 'desc'
             
         Returns:
-            pd.DataFrame: DataFrame formatado para exibição
+            Dict: Colunas, total de linhas e as linhas da página (listas de valores)
         """
-        if "error" in data:
-            # Retorna DataFrame vazio em caso de erro
-            return pd.DataFrame()
-        
-        # Converte os dados para DataFrame
-        df = pd.DataFrame(data["data"])
-        
-        # Renomeia as colunas para o formato de exibição
-        column_mapping = {
-            "Datetime": "Data/Hora",
-            "Date": "Data",
-            "open": "Abertura",
-            "high": "Máxima",
-            "low": "Mínima",
-            "close": "Fechamento",
-            "volume": "Volume"
+        page = self._page_positions(data, offset, limit, sort, order)
+        if "error" in page:
+            return page
+        frame, positions = page["frame"], page["positions"]
+        
+        columns = [("time", "Data/Hora" if frame.intraday else "Data"), ("open", "Abertura"),
+                   ("high", "Máxima"), ("low", "Mínima"), ("close", "Fechamento")]
+        if frame.volume is not None:
+            columns.append(("volume", "Volume"))
+        
+        values = [frame.time_labels[positions].tolist()]
+        for key, _ in columns[1:]:
+            column = np.round(getattr(frame, key)[positions], 5)
+            values.append(np.where(np.isnan(column), None, column).tolist() if np.isnan(column).any() else column.tolist())
+        
+        return {
+            "symbol": data["symbol"],
+            "timeframe": data["timeframe"],
+            "version": frame.version,
+            "columns": [{"key": key, "label": label} for key, label in columns],
+            "total": len(frame),
+            "offset": page["offset"],
+            "sort": sort,
+            "order": order,
+            "rows": [list(row) for row in zip(*values)]
         }
-        
-        # Identifica a coluna de data/hora
-        date_column = "Datetime" if "Datetime" in df.columns else "Date"
-        
-        # Formata a coluna de data/hora
-        if date_column in df.columns:
-            df[date_column] = pd.to_datetime(df[date_column])
-            
-            # Remove fins de semana (sábado=5, domingo=6)
-            # Mantém apenas dias úteis (segunda=0 até sexta=4)
-            df = df[df[date_column].dt.weekday < 5]
-            
-            if date_column == "Datetime":
-                df[date_column] = df[date_column].dt.strftime("%Y-%m-%d %H:%M")
-            else:
-                df[date_column] = df[date_column].dt.strftime("%Y-%m-%d")
-        
-        # Renomeia as colunas
-        df = df.rename(columns=column_mapping)
-        
-        # Arredonda os valores numéricos para 5 casas decimais
-        for col in ["Abertura", "Máxima", "Mínima", "Fechamento"]:
-            if col in df.columns:
-                df[col] = df[col].round(5)
-        
-        # Seleciona apenas as colunas relevantes
-        relevant_columns = [col for col in ["Data/Hora", "Data", "Abertura", "Máxima", "Mínima", "Fechamento", "Volume"] if col in df.columns]
-        df = df[relevant_columns]
-        
-        return df
     
-    def get_html_table(self, data: Dict[str, Any]) -> str:
+    def get_table_columns(self, data: Dict[str, Any], offset: int = 0, limit: int = 100,
+                          sort: str = "time", order: str = "asc") -> Dict[str, Any]:
         """
-        Gera uma tabela HTML a partir dos dados OHLC
+        Retorna uma página da tabela OHLC como colunas (para formatos binários, ex: Arrow)
         
         Args:
             data (Dict): Dados OHLC obtidos do agente Forex
+            offset, limit, sort, order: Ver get_table_page
             
         Returns:
-            str: Tabela HTML
+            Dict: 'columns' (arrays NumPy por nome, com 'time' em datetime64) e
+                'metadata' (símbolo, timeframe, versão e total de linhas)
         """
+        page = self._page_positions(data, offset, limit, sort, order)
+        if "error" in page:
+            return page
+        frame, positions = page["frame"], page["positions"]
+        
+        columns = {"time": frame.index.values[positions]}
+        for key in self.SORT_COLUMNS[1:]:
+            values = getattr(frame, key)
+            if values is not None:
+                columns[key] = values[positions]
+        
+        return {
+            "columns": columns,
+            "metadata": {
+                "symbol": data["symbol"],
+                "timeframe": data["timeframe"],
+                "version": frame.version,
+                "total": str(len(frame)),
+                "offset": str(page["offset"])
+            }
+        }
+    
+    def _page_positions(self, data: Dict[str, Any], offset: int, limit: int, sort: str, order: str) -> Dict[str, Any]:
+        """Valida o pedido e retorna o frame e as posições das barras da página"""
         if "error" in data:
-            return f"<div class='error'>Erro: {data['error']}</div>"
-        
-        df = self.format_ohlc_data(data)
-        
-        if df.empty:
-            return "<div class='error'>Não há dados disponíveis</div>"
-        
-        # Gera a tabela HTML com estilo
-        html = df.to_html(
-            classes="table table-striped table-hover table-bordered",
-            index=False
-        )
+            return {"error": data["error"]}
         
-        return html
+        frame = data["frame"]
+        if frame.empty:
+            return {"error": "Não há dados disponíveis"}
+        if sort not in self.SORT_COLUMNS or order not in ("asc", "desc"):
+            return {"error": f"Ordenação {sort} {order} não suportada"}
+        if sort == "volume" and frame.volume is None:
+            return {"error": "Volume não disponível para este ativo"}
+        
+        offset = max(0, offset)
+        positions = self._sort_order(frame, sort, order)[offset:offset + max(0, limit)]
+        return {"frame": frame, "positions": positions, "offset": offset}
     
     def get_summary_stats(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -104,37 +139,28 @@ class TableView:
         if "error" in data:
             return {"error": data["error"]}
         
-        # Converte os dados para DataFrame
-        df = pd.DataFrame(data["data"])
-        
-        if df.empty:
+        frame = data["frame"]
+        if frame.empty:
             return {"error": "Não há dados disponíveis"}
         
-        # Identifica a coluna de data/hora e aplica filtragem de fins de semana
-        date_column = "Datetime" if "Datetime" in df.columns else "Date"
-        if date_column in df.columns:
-            df[date_column] = pd.to_datetime(df[date_column])
-            
-            # Remove fins de semana (sábado=5, domingo=6)
-            # Mantém apenas dias úteis (segunda=0 até sexta=4)
-            df = df[df[date_column].dt.weekday < 5]
-            
-            if df.empty:
-                return {"error": "Não há dados disponíveis após filtragem"}
-        
         # Calcula estatísticas básicas
+        open_first = float(frame.open[0])
+        close_last = float(frame.close[-1])
         stats = {
             "symbol": data["symbol"],
             "timeframe": data["timeframe"],
-            "period_start": df["Datetime"].iloc[0] if "Datetime" in df.columns else df["Date"].iloc[0],
-            "period_end": df["Datetime"].iloc[-1] if "Datetime" in df.columns else df["Date"].iloc[-1],
-            "open_first": df["open"].iloc[0],
-            "close_last": df["close"].iloc[-1],
-            "high_max": df["high"].max(),
-            "low_min": df["low"].min(),
-            "change": df["close"].iloc[-1] - df["open"].iloc[0],
-            "change_pct": (df["close"].iloc[-1] - df["open"].iloc[0]) / df["open"].iloc[0] * 100
+            "period_start": frame.index[0],
+            "period_end": frame.index[-1],
+            "open_first": open_first,
+            "close_last": close_last,
+            "high_max": float(np.nanmax(frame.high)),
+            "low_min": float(np.nanmin(frame.low)),
+            "change": close_last - open_first,
+            "change_pct": (close_last - open_first) / open_first * 100
         }
         
+        # Valores mais recentes dos indicadores técnicos (última barra exibida)
+        if frame.indicators:
+            stats["indicators"] = latest_values(frame.indicators)
+        
         return stats
-        
\ No newline at end of file